@@ -1,79 +1,54 @@
 import streamlit as st
+import html
 import json
 import os
-from github import Github
 from datetime import date, timedelta
 import math
-from babel.dates import format_date
-from github.GithubException import GithubException
-
-#Repo-Infos
-GITHUB_USER="DST81"
-REPO_NAME="openlibrary-kontrolle"
-BRANCH= "main"
-FILE_PATH = "kontrollen.json"
-
-token=st.secrets['github_token']
-g=Github(token)
-repo= g.get_user(GITHUB_USER).get_repo(REPO_NAME)
+from openlibrary.avatars import AVATARS, avatar_html, sprite_css, thumbnail
+from openlibrary.config import FERIEN_ENDE, FERIEN_START, KONTROLLEN_PATH
+from openlibrary.dates import KURZ, LANG, format_date
+from openlibrary.day_status import day_status
+from openlibrary.data import (
+    LADEFEHLER, SPEICHER_STATUS, StorageUnavailable, data_version, load_kontrollen, record_status,
+    save_kontrollen, speicher_hinweise
+)
 
 # Kalenderwoche bestimmen
 today = date.today()
 year, week, _ = today.isocalendar()
 kw_key = f"{year}-W{week:02d}"
 
-#Hilfsfunktion
-def load_kontrollen():
-    try:
-        contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-        data = json.loads(contents.decoded_content.decode())
-        return data, contents.sha
-    except Exception:
-        return {}, None
-
-# Struktur prüfen und ggf. migrieren
-def migrate_kontrollen_if_needed(raw_data):
-    if "kontrollen" in raw_data and "wochenverantwortung" in raw_data:
-        return raw_data  # Alles schon gut
-    kontrollen = {}
-    wochenverantwortung = raw_data.get("wochenverantwortung", {})
-    for key, value in raw_data.items():
-        try:
-            date.fromisoformat(key)
-            kontrollen[key] = value
-        except ValueError:
-            pass  # andere Keys ignorieren
-    return {
-        "kontrollen": kontrollen,
-        "wochenverantwortung": wochenverantwortung
-    }
-def save_kontrollen(kontrollen, sha):
-    new_content = json.dumps(kontrollen, indent=2, ensure_ascii=False)
-    commit_message = f"Update Kontrollen am {date.today().isoformat()}"
-    try:
-        if sha:
-            repo.update_file(FILE_PATH, commit_message, new_content, sha, branch=BRANCH)
-        else:
-            repo.create_file(FILE_PATH, commit_message, new_content, branch=BRANCH)
-    except GithubException as e:
-        if e.status == 422 and "already exists" in str(e):
-            # Datei existiert bereits – trotzdem update versuchen
-            contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-            repo.update_file(FILE_PATH, commit_message, new_content, contents.sha, branch=BRANCH)
-        else:
-            raise
-    #Neustes sha holen für nächsten Update
-    contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-    return contents.sha
-    
-# Daten laden
-raw_data, sha = load_kontrollen()
-data = migrate_kontrollen_if_needed(raw_data)
-kontrollen = data.get("kontrollen", {})
-wochenverantwortung = data.get("wochenverantwortung", {})
+# Ferienzeitraum (in openlibrary/config.py anpassen)
+ferien_start = FERIEN_START
+ferien_ende = FERIEN_ENDE
+
+st.set_page_config(page_title="OpenLibrary Ferienkontrolle 🧹", page_icon="📚")
+
+#Alle Tage der Ferien iterieren
+days_count = (ferien_ende-ferien_start).days+1
+days= [ferien_start+timedelta(days=i) for i in range(days_count)]
+days=[d for d in days if d <=today]
+weeks=[days[i:i+7] for i in range(0, len(days), 7)]
+weeks.reverse()
+
+# Standardmässig nur aktuelle und vorherige Woche, ältere auf Knopfdruck
+if "wochen_anzeigen" not in st.session_state:
+    st.session_state.wochen_anzeigen = 2
+sichtbare_wochen = weeks[:st.session_state.wochen_anzeigen]
+
+# Daten laden: sichtbare Wochen (±2 Tage für die Farbe der Randtage) und die laufende KW
+monday = today - timedelta(days=today.weekday())
+von = min([monday] + [week_days[0] for week_days in sichtbare_wochen]) - timedelta(days=2)
+# Struktur ist über schema_version festgelegt und wird beim Laden einmalig migriert
+try:
+    data, sha = load_kontrollen(von, today + timedelta(days=2))
+except StorageUnavailable:
+    st.error(LADEFEHLER)
+    st.stop()
+kontrollen = data["kontrollen"]
+wochenverantwortung = data["wochenverantwortung"]
 DATE_FORMAT = "%Y-%m-%d"
 JSON_FILE = kontrollen
-st.set_page_config(page_title="OpenLibrary Ferienkontrolle 🧹", page_icon="📚")
 
 #CSS für Karten
 st.markdown(
@@ -91,6 +66,11 @@ st.markdown(
         box-shadow:0 0 10px rgba(0,0,0,0.1);
         margin-bottom:1rem;
     }
+    .woche{
+        display: grid;
+        grid-template-columns: repeat(7, minmax(0, 1fr));
+        gap: 1rem;
+    }
     .green{ background: #d4edda;} /*kontrolliert*/
     .orange{ background: #fff3cd; } /* in der Nähe einer Kontrolle */
     .red { background: #f8d7da; }    /* nicht kontrolliert */
@@ -100,72 +80,52 @@ st.markdown(
 )
 st.title("📚 OpenLibrary Kontrolle 📚 ")
 
-# Avatare
-avatars = {
-    "Aniko": "avatars/aniko.png",
-    "Daniela": "avatars/daniela.png",
-    "Debora": "avatars/debora.png",
-    "Janine": "avatars/janine.png",
-    "Sarah": "avatars/sarah.png",
-    "Susanne": "avatars/susanne.png"
-}
-
-# Mitarbeiter auswählen
-mitarbeiter_name = st.selectbox(
-    "Bitte auswählen:",
-    list(avatars.keys())
-)
+# Konflikte und fehlgeschlagenes Speichern melden
+speicher_hinweise(KONTROLLEN_PATH)
 
+# Avatare
+avatars = AVATARS
+
+# Formulare laufen als Fragmente: Auswahl und Eingaben rechnen nur das eigene Fragment
+# neu, nicht Laden, CSS und Raster. Alle teilen sich data/sha aus dem letzten vollen
+# Lauf; erst nach dem Speichern wird die ganze Seite neu aufgebaut.
+@st.fragment
+def check_in(data, sha):
+    # Mitarbeiter auswählen
+    mitarbeiter_name = st.selectbox(
+        "Bitte auswählen:",
+        list(avatars.keys())
+    )
+
+    # Check-In
+    heute = date.today().isoformat()
+    bemerkung = st.text_area(f"Bemerkung für {mitarbeiter_name} am {heute}")
+    if st.button(f"{mitarbeiter_name} hat heute OpenLibrary kontrolliert"):
+        data["kontrollen"][heute] = {
+            "mitarbeiter": mitarbeiter_name,
+            "bemerkung": bemerkung
+            }
+        save_kontrollen(data, sha)
+        st.toast(f"Danke, {mitarbeiter_name}! – Kontrolle am {heute} erledigt!")
+        st.rerun()
 
-# Check-In
-heute = date.today().isoformat()
-bemerkung = st.text_area(f"Bemerkung für {mitarbeiter_name} am {heute}")
-if st.button(f"{mitarbeiter_name} hat heute OpenLibrary kontrolliert"):
-    kontrollen[heute] = {
-        "mitarbeiter": mitarbeiter_name,
-        "bemerkung": bemerkung
-        }
-    sha = save_kontrollen({"kontrollen": kontrollen, "wochenverantwortung": wochenverantwortung},sha)
-    st.success(f"Danke, {mitarbeiter_name}! – Kontrolle am {heute} erledigt!")
+check_in(data, sha)
 
 st.markdown("---")
 
-#Editiermodus-Stauts
-if 'edit_mode' not in st.session_state:
-    st.session_state.edit_mode = None
 
-# Ferienzeitraum (hier anpassen)
-ferien_start =date(2026,6,15)
-ferien_ende =date(2026,8,10)
+# Farbe aller Tage in einem Durchgang, gemerkt pro Datenstand
+version = data_version(sha)
+status = day_status(kontrollen, days[0], days[-1], version) if days else {}
 
 
-#Alle Tage der Ferien iterieren
-days_count = (ferien_ende-ferien_start).days+1
-days= [ferien_start+timedelta(days=i) for i in range(days_count)]
-today=date.today()
-days=[d for d in days if d <=today]
-weeks=[days[i:i+7] for i in range(0, len(days), 7)]
-weeks.reverse()
-
-controlled_days = set()
-for t in kontrollen.keys():
-    try:
-        dt = date.fromisoformat(t)
-        controlled_days.add(dt)
-    except ValueError:
-        # Schlüssel ist kein Datum, einfach ignorieren
-        pass
-
-
-monday = today - timedelta(days=today.weekday())
 current_week_days = [monday + timedelta(days=i) for i in range(7)]
 
 # Extrahiere Wochenverantwortung oder leere initialisieren
 aktuell_verantwortliche = wochenverantwortung.get(kw_key, None)
 
 if aktuell_verantwortliche:
-    avatar_path = avatars.get(aktuell_verantwortliche)
-    if avatar_path:
+    if aktuell_verantwortliche in avatars:
         # Eine Zeile mit: "Titel | Avatar mit Namen darunter"
         col1, col2 = st.columns([3, 1])
 
@@ -174,7 +134,7 @@ if aktuell_verantwortliche:
 
         with col2:
             # Avatar und Name zusammen in einem zentrierten div
-            st.image(avatar_path, width=100)
+            st.image(thumbnail(aktuell_verantwortliche, 100), width=100)
             st.markdown(f"<div style='font-weight: bold; font-size: 18px; margin-top: 8px;'>{aktuell_verantwortliche}</div>", unsafe_allow_html=True)
 
 
@@ -187,93 +147,114 @@ else:
 
 
 
-# Sicherer Index für Dropdown (wenn aktuell nicht gesetzt, 0 als Default)
-if aktuell_verantwortliche in avatars:
-    default_index = list(avatars.keys()).index(aktuell_verantwortliche)
-else:
-    default_index = 0
-
 # Diese Woche
 st.markdown("### Kontrollierte Tage")
 
-# Tage in Wochenblöcken
-for week_days in weeks:
-    cols = st.columns(7)  # 7 Spalten für die Woche
-    for col, tag_date in zip(cols, week_days):
-        tag = tag_date.isoformat()
-
-        # Farbe der Karte berechnen
-        if tag_date in controlled_days:
-            color_class = "green"
-        elif any((tag_date + timedelta(days=d)) in controlled_days for d in range(-2, 3) if d != 0):
-            color_class = "orange"
-        else:
-            color_class = "red"
-
-        with col:
-            st.markdown(f'<div class="card {color_class}">', unsafe_allow_html=True)
-            st.markdown(f"**{format_date(tag_date, format='EEE dd.MM', locale='de')}**")
-
-            if tag in kontrollen:
-                checked_by = kontrollen[tag]["mitarbeiter"]
-                note = kontrollen[tag].get("bemerkung", "")
-                st.image(avatars[checked_by])
-                st.markdown(f"**{checked_by}**")
-
-                if st.session_state.edit_mode == tag:
-                    new_note = st.text_area("Bearbeite Bemerkung:", value=note, key=f"note_input_{tag}"),
-                    c1, c2 = st.columns(2)
-                    if c1.button("💾", key=f"save_{tag}"):
-                        kontrollen[tag]["bemerkung"] = new_note.strip()
-                        sha=save_kontrollen({"kontrollen":kontrollen,"wochenverantwortung":wochenverantwortung}, sha)
-                        st.session_state.edit_mode = None
-                        st.rerun()
-                    if c2.button("❌", key=f"cancel_{tag}"):
-                        st.session_state.edit_mode = None
-                        st.rerun()
-                else:
-                    if note:
-                        st.caption(f"💬 {note}")
-                    c1,c2 = st.columns(2)
-                    if c1.button("✏️", key=f"edit_{tag}"):
-                        st.session_state.edit_mode = tag
-                        st.rerun()
-                    if c2.button("🗑️", key=f"delete_{tag}"):
-                        del kontrollen[tag]
-                        sha= save_kontrollen({"kontrollen":kontrollen,"wochenverantwortung":wochenverantwortung}, sha)
-                        st.rerun()
-            else:
-                st.markdown("❌ nicht kontrolliert")
-            st.markdown("</div>", unsafe_allow_html=True)
-
-#Kontrolle und Bemerkung nachtragen
-st.markdown('### Kontrolle nachtragen')
-kontroll_tag=st.selectbox(
-    "Wähle den Tag aus:",
-    options= days,
-    format_func=lambda d: format_date(d, format='EEE dd.MM.yyyy', locale='de'),
+def karte_html(tag_date, kontrollen, status):
+    # Eine Tageskarte als HTML; Bemerkungen sind Freitext und werden escaped
+    tag = tag_date.isoformat()
+    color_class = status[tag_date]
+    inhalt = f"<b>{format_date(tag_date, KURZ)}</b><br>"
+    if tag in kontrollen:
+        checked_by = kontrollen[tag]["mitarbeiter"]
+        note = kontrollen[tag].get("bemerkung", "")
+        inhalt += f"{avatar_html(checked_by, size=40)}<br><b>{html.escape(checked_by)}</b>"
+        speicher_status = record_status(KONTROLLEN_PATH, f"kontrollen/{tag}")
+        if speicher_status in SPEICHER_STATUS:
+            inhalt += f"<br><small>{SPEICHER_STATUS[speicher_status]}</small>"
+        if note:
+            inhalt += f"<br><small>💬 {html.escape(note)}</small>"
+    else:
+        inhalt += "❌ nicht kontrolliert"
+    return f'<div class="card {color_class}">{inhalt}</div>'
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def woche_html(week_days, version, _kontrollen, _status):
+    # View-Model einer Woche als fertiges HTML. Neu gebaut wird nur, wenn sich der
+    # Datenstand (sha und wartende Änderungen) geändert hat – sonst aus dem Cache.
+    karten = "".join(karte_html(tag_date, _kontrollen, _status) for tag_date in week_days)
+    return f'<div class="woche">{karten}</div>'
+
+# Ganzes Raster als ein einziges Element statt Spalten, Bilder und Buttons pro Tag
+st.markdown(sprite_css(40), unsafe_allow_html=True)
+st.markdown(
+    "".join(woche_html(tuple(week_days), version, kontrollen, status) for week_days in sichtbare_wochen),
+    unsafe_allow_html=True,
 )
-mitarbeiter= st.selectbox('Mitarbeiterin auswählen', list(avatars.keys()))
-bemerkung = st.text_area('Bemerkung')
+if len(weeks) > len(sichtbare_wochen):
+    if st.button("⬇️ ältere Wochen laden", key="mehr_wochen"):
+        st.session_state.wochen_anzeigen += 2
+        st.rerun()
 
-if st.button('✅ Kontrolle speichern'):
-    if not mitarbeiter.strip():
-        st.error('Bitte deinen Namen eingeben!')
-    else:
-        tag_str=kontroll_tag.strftime(DATE_FORMAT)
-        kontrollen[tag_str]={
-            "mitarbeiter":mitarbeiter.strip(),
-            "bemerkung": bemerkung.strip(),
-        }
-        sha=save_kontrollen({"kontrollen": kontrollen, "wochenverantwortung": wochenverantwortung}, sha)
-        st.success(
-            f"Kontrolle am {format_date(kontroll_tag, format='EEE dd.MM.yyyy', locale='de')} von {mitarbeiter} gespeichert!\nBemerkung: {bemerkung}"
+# Bearbeiten und Löschen über eine gemeinsame Auswahl
+@st.fragment
+def eintrag_bearbeiten(data, sha, kontrollierte_tage):
+    kontrollen = data["kontrollen"]
+    with st.expander("✏️ Eintrag bearbeiten oder löschen"):
+        edit_tag = st.selectbox(
+            "Tag",
+            options=kontrollierte_tage,
+            format_func=lambda d: (
+                f"{format_date(d, LANG)} – {kontrollen[d.isoformat()]['mitarbeiter']}"
+            ),
+            key="edit_tag",
         )
+        tag = edit_tag.isoformat()
+        new_note = st.text_area("Bearbeite Bemerkung:", value=kontrollen[tag].get("bemerkung", ""), key=f"note_input_{tag}")
+        c1, c2 = st.columns(2)
+        if c1.button("💾 Bemerkung speichern", key="save_note"):
+            kontrollen[tag]["bemerkung"] = new_note.strip()
+            save_kontrollen(data, sha)
+            st.rerun()
+        if c2.button("🗑️ Eintrag löschen", key="delete_entry"):
+            del kontrollen[tag]
+            save_kontrollen(data, sha)
+            st.rerun()
+
+kontrollierte_tage = [d for week_days in sichtbare_wochen for d in week_days if d.isoformat() in kontrollen]
+if kontrollierte_tage:
+    eintrag_bearbeiten(data, sha, kontrollierte_tage)
+
+#Kontrolle und Bemerkung nachtragen
+@st.fragment
+def kontrolle_nachtragen(data, sha):
+    st.markdown('### Kontrolle nachtragen')
+    kontroll_tag=st.selectbox(
+        "Wähle den Tag aus:",
+        options= days,
+        format_func=lambda d: format_date(d, LANG),
+    )
+    mitarbeiter= st.selectbox('Mitarbeiterin auswählen', list(avatars.keys()))
+    bemerkung = st.text_area('Bemerkung')
+
+    if st.button('✅ Kontrolle speichern'):
+        if not mitarbeiter.strip():
+            st.error('Bitte deinen Namen eingeben!')
+        else:
+            tag_str=kontroll_tag.strftime(DATE_FORMAT)
+            data["kontrollen"][tag_str]={
+                "mitarbeiter":mitarbeiter.strip(),
+                "bemerkung": bemerkung.strip(),
+            }
+            save_kontrollen(data, sha)
+            st.toast(
+                f"Kontrolle am {format_date(kontroll_tag, LANG)} von {mitarbeiter} gespeichert!\nBemerkung: {bemerkung}"
+            )
+            st.rerun()
+
+kontrolle_nachtragen(data, sha)
+
+@st.fragment
+def wochenverantwortung_waehlen(data, sha):
+    # Sicherer Index für Dropdown (wenn aktuell nicht gesetzt, 0 als Default)
+    aktuell = data["wochenverantwortung"].get(kw_key)
+    default_index = list(avatars.keys()).index(aktuell) if aktuell in avatars else 0
+    # Auswahl über Dropdown mit sicherem Default-Index
+    neue_verantwortliche = st.selectbox("➕ Verantwortliche Person für diese Woche zuweisen:", list(avatars.keys()), index=default_index)
+    if st.button("✅ Wochenverantwortliche speichern", key="save_wochen"):
+        data["wochenverantwortung"][kw_key] = neue_verantwortliche
+        save_kontrollen(data, sha)
+        st.toast(f"✅ Verantwortliche für KW {week} ist jetzt: **{neue_verantwortliche}**")
         st.rerun()
-# Auswahl über Dropdown mit sicherem Default-Index
-neue_verantwortliche = st.selectbox("➕ Verantwortliche Person für diese Woche zuweisen:", list(avatars.keys()), index=default_index)
-if st.button("✅ Wochenverantwortliche speichern", key="save_wochen"):
-    wochenverantwortung[kw_key] = neue_verantwortliche
-    sha = save_kontrollen({"kontrollen": kontrollen, "wochenverantwortung": wochenverantwortung}, sha)
-    st.success(f"✅ Verantwortliche für KW {week} ist jetzt: **{neue_verantwortliche}**")
-    st.rerun()
+
+wochenverantwortung_waehlen(data, sha)
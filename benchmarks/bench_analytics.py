@@ -0,0 +1,76 @@
+# Statistik über eine lange, synthetische Geschichte: erste Berechnung, gleicher
+# Datenstand (Cache) und eine einzelne Änderung (inkrementell).
+# Aufruf aus dem Projektordner: python benchmarks/bench_analytics.py >> bench_output.txt
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openlibrary.analytics import Einsatzstatistik, Kontrollstatistik
+from openlibrary.avatars import AVATARS
+
+JAHRE = 20
+WIEDERHOLUNGEN = 200
+FERIEN = (date(2024, 6, 15), date(2024, 8, 10))
+
+
+def geschichte(jahre, seed=1):
+    rng = random.Random(seed)
+    namen = list(AVATARS)
+    start = date.today() - timedelta(days=365 * jahre)
+    kontrollen, planung = {}, {"schema_version": 1}
+    for i in range(365 * jahre):
+        tag = (start + timedelta(days=i)).isoformat()
+        if rng.random() < 0.8:
+            kontrollen[tag] = {"mitarbeiter": rng.choice(namen), "bemerkung": ""}
+        planung[tag] = {
+            "oeffnungszeiten": {"Morgen": rng.sample(namen, 1), "Nachmittag": rng.sample(namen, rng.randint(0, 2))},
+            "klassenbesuch": None,
+            "bemerkung": None,
+        }
+    return kontrollen, planung
+
+
+def ms(func, number=WIEDERHOLUNGEN):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1000
+
+
+def main():
+    kontrollen, planung = geschichte(JAHRE)
+    tage = sorted(kontrollen)
+    namen = list(AVATARS)
+    print(f"bench_analytics: {JAHRE} Jahre, {len(kontrollen)} Kontrollen, {len(planung) - 1} Planungstage (ms pro Aufruf)")
+
+    kalt = ms(lambda: Kontrollstatistik().update(kontrollen, *FERIEN, version=0), number=20)
+    statistik = Kontrollstatistik()
+    statistik.update(kontrollen, *FERIEN, version=0)
+    cache = ms(lambda: statistik.update(kontrollen, *FERIEN, version=0))
+    version = iter(range(1, 10 ** 9))
+
+    def eine_aenderung():
+        kontrollen[random.choice(tage)]["mitarbeiter"] = random.choice(namen)
+        statistik.update(kontrollen, *FERIEN, version=next(version))
+    inkrementell = ms(eine_aenderung)
+    print(f"  Kontrollen   erste Berechnung {kalt:7.2f}   gleicher Stand {cache:7.4f}   eine Änderung {inkrementell:7.2f}")
+
+    kalt = ms(lambda: Einsatzstatistik().update(planung, version=0), number=20)
+    einsatz = Einsatzstatistik()
+    einsatz.update(planung, version=0)
+    cache = ms(lambda: einsatz.update(planung, version=0))
+    planungstage = [tag for tag in planung if tag != "schema_version"]
+
+    def eine_schicht():
+        planung[random.choice(planungstage)]["oeffnungszeiten"] = {"Morgen": [random.choice(namen)]}
+        einsatz.update(planung, version=next(version))
+    inkrementell = ms(eine_schicht)
+    print(f"  Einsatz      erste Berechnung {kalt:7.2f}   gleicher Stand {cache:7.4f}   eine Änderung {inkrementell:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
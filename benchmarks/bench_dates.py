@@ -0,0 +1,52 @@
+# Datumsformatierung: babel.dates.format_date direkt gegen openlibrary.dates.
+# Aufruf aus dem Projektordner: python benchmarks/bench_dates.py >> bench_output.txt
+import sys
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from babel.dates import format_date as babel_format_date
+
+from openlibrary import dates
+
+RERUNS = 200
+# Ein Rerun der Startseite: Ferientage (Karten und Auswahlliste) und sieben Spaltenköpfe
+TAGE = [date(2026, 6, 15) + timedelta(days=i) for i in range(57)]
+
+
+def rerun_babel():
+    for tag in TAGE:
+        babel_format_date(tag, format=dates.KURZ, locale=dates.LOCALE)
+        babel_format_date(tag, format=dates.LANG, locale=dates.LOCALE)
+    for tag in TAGE[:7]:
+        babel_format_date(tag, format=dates.SPALTE, locale=dates.LOCALE)
+
+
+def rerun_cached():
+    for tag in TAGE:
+        dates.format_date(tag, dates.KURZ)
+        dates.format_date(tag, dates.LANG)
+    for tag in TAGE[:7]:
+        dates.format_date(tag, dates.SPALTE)
+
+
+def main():
+    # Beide Varianten liefern denselben Text
+    for pattern in (dates.KURZ, dates.LANG, dates.SPALTE):
+        for tag in TAGE:
+            assert dates.format_date(tag, pattern) == babel_format_date(tag, format=pattern, locale=dates.LOCALE)
+    dates.format_date.cache_clear()
+
+    aufrufe = RERUNS * (2 * len(TAGE) + 7)
+    babel = timeit.timeit(rerun_babel, number=RERUNS)
+    cached = timeit.timeit(rerun_cached, number=RERUNS)
+    print(f"bench_dates: {RERUNS} Reruns, {aufrufe} Aufrufe")
+    print(f"  babel.format_date   {babel * 1000:8.1f} ms  {babel / aufrufe * 1e6:6.2f} µs/Aufruf")
+    print(f"  dates.format_date   {cached * 1000:8.1f} ms  {cached / aufrufe * 1e6:6.2f} µs/Aufruf  ({babel / cached:.0f}x)")
+    print(f"  {dates.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Kaltstart pro Seite: Importe (python -X importtime) und Dauer des ersten Laufs.
+# Jede Seite läuft in einem frischen Prozess mit lokalem Speicher auf einer Kopie der Daten.
+# Aufruf aus dem Projektordner: python benchmarks/bench_imports.py >> bench_output.txt
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from openlibrary import config
+
+PAGES = [
+    "app.py",
+    "pages/0_Arbeitsplanung.py",
+    "pages/1_testen.py",
+    "pages/2_Statistik.py",
+    "pages/3_test.py",
+    "pages/4_Admin.py",
+    "pages/hidden/1_Arbeitsplanung_ersterVersuch.py",
+    "pages/hidden/2_Arbeitsplanung_alternativ.py",
+    "pages/hidden/3_Test.py",
+]
+# Schwere, optionale Module: sollen nur dort auftauchen, wo sie gebraucht werden
+WATCH = ("github", "requests", "babel", "streamlit_calendar", "numpy", "PIL")
+MARKER = "=== seite ==="
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_page(page):
+    # Im Kindprozess: AppTest laden, dann nur die Importe der Seite selbst messen
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / page), default_timeout=120)
+    print(MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"render_ms": elapsed * 1000, "exception": bool(at.exception)}))
+
+
+def imports_after_marker(stderr):
+    # -> ({Modul auf oberster Ebene: kumulierte ms}, {alle geladenen Pakete})
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    top, packages = {}, set()
+    for line in lines:
+        match = LINE.match(line)
+        if not match:
+            continue
+        packages.add(match.group(4).split(".")[0])
+        if match.group(3) == " ":
+            # Nur Importe auf oberster Ebene; ihre kumulierte Zeit enthält die Untermodule
+            top[match.group(4)] = int(match.group(2)) / 1000
+    return top, packages
+
+
+def measure(page, data_dir):
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        OPENLIBRARY_STORAGE="local",
+        OPENLIBRARY_LOCAL_ROOT=data_dir,
+        OPENLIBRARY_JOURNAL_PATH=str(Path(data_dir) / "journal.jsonl"),
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, "--page", page],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return (wall, report) + imports_after_marker(result.stderr)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name in (config.KONTROLLEN_PATH, config.PLANUNG_PATH):
+            if (ROOT / name).exists():
+                shutil.copy(ROOT / name, data_dir)
+        print("bench_imports: Kaltstart pro Seite (ms)")
+        print(f"  {'Seite':<46} {'Prozess':>8} {'1. Lauf':>8} {'Importe':>8}  schwerste Importe / geladen")
+        for page in PAGES:
+            wall, report, top, packages = measure(page, data_dir)
+            heaviest = sorted(top.items(), key=lambda item: -item[1])[:3]
+            loaded = [name for name in WATCH if name in packages]
+            fehler = "  FEHLER" if report["exception"] else ""
+            print(
+                f"  {page:<46} {wall:8.0f} {report['render_ms']:8.0f} {sum(top.values()):8.0f}  "
+                f"{', '.join(f'{name} {ms:.0f}' for name, ms in heaviest)} / {', '.join(loaded) or '-'}{fehler}"
+            )
+
+
+if __name__ == "__main__":
+    if "--page" in sys.argv:
+        run_page(sys.argv[sys.argv.index("--page") + 1])
+    else:
+        main()
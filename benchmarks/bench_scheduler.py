@@ -0,0 +1,78 @@
+# Automatische Einteilung über mehrere Monate auf einer synthetischen Historie:
+# Laufzeit, Verteilung der Schichten und Prüfung der Regeln.
+# Aufruf aus dem Projektordner: python benchmarks/bench_scheduler.py >> bench_output.txt
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openlibrary.avatars import AVATARS
+from openlibrary.scheduler import Verfuegbarkeit, active_slots, apply, history, plan
+
+HISTORIE_JAHRE = 5
+MONATE = (3, 6, 12, 24)
+WIEDERHOLUNGEN = 20
+START = date(2026, 1, 5)  # ein Montag
+
+
+def historie(jahre, seed=1):
+    rng = random.Random(seed)
+    namen = list(AVATARS)
+    planung = {"schema_version": 1}
+    von = START - timedelta(days=365 * jahre)
+    # Ungleich verteilt, damit der Ausgleich etwas zu tun hat
+    for tag, zeit in active_slots(von, START - timedelta(days=1)):
+        eintrag = planung.setdefault(tag.isoformat(), {"oeffnungszeiten": {}, "klassenbesuch": None, "bemerkung": None})
+        eintrag["oeffnungszeiten"][zeit] = [rng.choices(namen, weights=range(1, len(namen) + 1))[0]]
+    return planung
+
+
+def pruefen(planung, vorschlag, slots, verfuegbarkeit):
+    # -> Anzahl Verstösse gegen Verfügbarkeit, Maximum und "nicht zweimal hintereinander"
+    verstoesse = 0
+    anzahl = {}
+    vorher = set()
+    for tag, zeit in slots:
+        personen = vorschlag.zuteilung.get((tag, zeit), [])
+        for person in personen:
+            regel = verfuegbarkeit.get(person, Verfuegbarkeit())
+            anzahl[person] = anzahl.get(person, 0) + 1
+            verstoesse += tag.weekday() not in regel.wochentage
+            verstoesse += regel.max_schichten is not None and anzahl[person] > regel.max_schichten
+            verstoesse += person in vorher
+        vorher = set(personen)
+    return verstoesse, anzahl
+
+
+def main():
+    planung = historie(HISTORIE_JAHRE)
+    namen = list(AVATARS)
+    # Eine Person nur Di und Do, eine mit Obergrenze
+    verfuegbarkeit = {namen[0]: Verfuegbarkeit(frozenset({1, 3})), namen[1]: Verfuegbarkeit(max_schichten=10)}
+    vorher = history(planung)
+    print(f"bench_scheduler: Historie {HISTORIE_JAHRE} Jahre, {sum(vorher.values())} Schichten")
+    print(f"  Historie: {', '.join(f'{p} {n}' for p, n in sorted(vorher.items()))}")
+    for monate in MONATE:
+        bis = START + timedelta(days=round(monate * 30.44) - 1)
+        slots = active_slots(START, bis)
+        start = time.perf_counter()
+        for _ in range(WIEDERHOLUNGEN):
+            vorschlag = plan(planung, slots, namen, verfuegbarkeit)
+        dauer = (time.perf_counter() - start) / WIEDERHOLUNGEN * 1000
+        assert plan(planung, slots, namen, verfuegbarkeit) == vorschlag, "nicht deterministisch"
+        verstoesse, neu = pruefen(planung, vorschlag, slots, verfuegbarkeit)
+        total = history(apply({k: v for k, v in planung.items()}, vorschlag))
+        # Ausgleich: Abstand der Gesamtzahlen ohne die eingeschränkten Personen
+        frei = [total[p] for p in namen[2:]]
+        print(
+            f"  {monate:2d} Monate: {len(slots):4d} Slots {dauer:7.2f} ms  offen {len(vorschlag.offen)}  "
+            f"Verstösse {verstoesse}  Spannweite total {max(frei) - min(frei)}  "
+            f"neu: {', '.join(f'{p} {neu.get(p, 0)}' for p in namen)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Gemeinsame Hilfsmodule für die OpenLibrary-Seiten (app.py und pages/)
@@ -0,0 +1,175 @@
+import threading
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .dates import WOCHENTAGE
+SPALTEN = ["Kontrollen", "Längste Lücke (Tage)", "Längste Serie (Tage)", "Anteil Ferien"]
+
+
+def _ordinal(key):
+    # Datumsschlüssel -> Tagesnummer; andere Schlüssel (z. B. schema_version) -> None
+    try:
+        return date.fromisoformat(key).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+_FEHLT = object()
+
+
+def _changed(old, new):
+    # Schlüssel, deren Wert neu, anders oder weg ist
+    geaendert = [k for k, v in new.items() if old.get(k, _FEHLT) != v]
+    if len(old) + len(geaendert) > len(new):
+        geaendert += [k for k in old if k not in new]
+    return geaendert
+
+
+@dataclass
+class Statistik:
+    personen: pd.DataFrame  # eine Zeile pro Person, Spalten siehe SPALTEN
+    wochentage: pd.DataFrame  # Person x Wochentag, Anzahl Kontrollen
+    abdeckung: float  # Anteil der Ferientage mit irgendeiner Kontrolle
+    ferientage: int
+
+
+class Kontrollstatistik:
+    # Kennzahlen pro Person aus kontrollen. Der letzte Stand bleibt im Speicher:
+    # gleicher Datenstand -> fertiges Ergebnis, sonst werden nur die Personen neu
+    # gerechnet, deren Einträge sich geändert haben.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._result = None
+        self._ferien = None
+        self._wer = {}  # Datumsschlüssel -> Person
+        self._tage = {}  # Person -> Menge der Tagesnummern
+        self._alle = {}  # Tagesnummer -> Anzahl Kontrollen (für die Abdeckung)
+        self._zeilen = {}  # Person -> (Kennzahlen, Wochentage)
+
+    def update(self, kontrollen, ferien_start, ferien_ende, version=None):
+        with self._lock:
+            key = (version, ferien_start, ferien_ende)
+            if version is not None and key == self._key:
+                return self._result
+            ferien = (ferien_start.toordinal(), ferien_ende.toordinal())
+            neu = {tag: k.get("mitarbeiter") for tag, k in kontrollen.items() if isinstance(k, dict)}
+            betroffen = set()
+            for tag in _changed(self._wer, neu):
+                tag_nr = _ordinal(tag)
+                if tag_nr is None:
+                    continue
+                if self._wer.get(tag):
+                    self._tage[self._wer[tag]].discard(tag_nr)
+                    betroffen.add(self._wer[tag])
+                    self._alle[tag_nr] -= 1
+                if neu.get(tag):
+                    self._tage.setdefault(neu[tag], set()).add(tag_nr)
+                    betroffen.add(neu[tag])
+                    self._alle[tag_nr] = self._alle.get(tag_nr, 0) + 1
+            self._wer = neu
+            if ferien != self._ferien:
+                betroffen = set(self._tage)
+                self._ferien = ferien
+            for person in betroffen:
+                if self._tage.get(person):
+                    self._zeilen[person] = _person(np.fromiter(sorted(self._tage[person]), dtype=np.int64), ferien)
+                else:
+                    self._tage.pop(person, None)
+                    self._zeilen.pop(person, None)
+            self._result = self._frames(ferien)
+            self._key = key
+            return self._result
+
+    def _frames(self, ferien):
+        namen = sorted(self._zeilen)
+        personen = pd.DataFrame([self._zeilen[n][0] for n in namen], index=namen, columns=SPALTEN)
+        wochentage = pd.DataFrame([self._zeilen[n][1] for n in namen], index=namen, columns=WOCHENTAGE)
+        personen.index.name = wochentage.index.name = "Person"
+        ferientage = max(0, ferien[1] - ferien[0] + 1)
+        abgedeckt = sum(1 for t in range(ferien[0], ferien[1] + 1) if self._alle.get(t))
+        abdeckung = abgedeckt / ferientage if ferientage else 0.0
+        return Statistik(personen, wochentage, abdeckung, ferientage)
+
+
+def _person(tage, ferien):
+    # tage: sortierte Tagesnummern einer Person -> (Kennzahlen, Anzahl pro Wochentag)
+    abstaende = np.diff(tage)
+    # Serien: Läufe von Abständen == 1; Bruchstellen trennen sie
+    brueche = np.flatnonzero(abstaende != 1)
+    serien = np.diff(np.concatenate(([-1], brueche, [len(tage) - 1])))
+    in_ferien = np.count_nonzero((tage >= ferien[0]) & (tage <= ferien[1]))
+    ferientage = ferien[1] - ferien[0] + 1
+    kennzahlen = [
+        len(tage),
+        int(abstaende.max()) - 1 if len(abstaende) else 0,  # Tage ohne Kontrolle dazwischen
+        int(serien.max()),
+        in_ferien / ferientage if ferientage > 0 else 0.0,
+    ]
+    # date.toordinal(): Tag 1 ist ein Montag -> (n - 1) % 7 ist der Wochentag (0 = Montag)
+    wochentage = np.bincount((tage - 1) % 7, minlength=7).tolist()
+    return kennzahlen, wochentage
+
+
+ZEITEN = ["Morgen", "Nachmittag", "Abend"]
+
+
+def _zeit_reihenfolge(zeit):
+    return (ZEITEN.index(zeit), zeit) if zeit in ZEITEN else (len(ZEITEN), zeit)
+
+
+class Einsatzstatistik:
+    # Eingeteilte Schichten pro Person und Zeit aus planung[tag]["oeffnungszeiten"].
+    # Zähler werden pro geändertem Tag angepasst statt über alle Tage neu summiert.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._result = None
+        self._tage = {}  # Datumsschlüssel -> oeffnungszeiten
+        self._zaehler = {}  # (Person, Zeit) -> Anzahl
+
+    def _zaehlen(self, oeffnungszeiten, schritt):
+        for zeit, personen in (oeffnungszeiten or {}).items():
+            for person in personen or []:
+                key = (person, zeit)
+                self._zaehler[key] = self._zaehler.get(key, 0) + schritt
+                if not self._zaehler[key]:
+                    del self._zaehler[key]
+
+    def update(self, planung, version=None):
+        with self._lock:
+            if version is not None and version == self._key:
+                return self._result
+            neu = {tag: eintrag.get("oeffnungszeiten") for tag, eintrag in planung.items() if isinstance(eintrag, dict)}
+            for tag in _changed(self._tage, neu):
+                if _ordinal(tag) is None:
+                    continue
+                self._zaehlen(self._tage.get(tag), -1)
+                self._zaehlen(neu.get(tag), 1)
+            self._tage = neu
+            # Nur wenige Personen und Zeiten: Tabelle direkt aus den Zählern
+            personen = sorted({person for person, _ in self._zaehler})
+            zeiten = sorted({zeit for _, zeit in self._zaehler}, key=_zeit_reihenfolge)
+            werte = np.zeros((len(personen), len(zeiten) + 1), dtype=np.int64)
+            for (person, zeit), anzahl in self._zaehler.items():
+                werte[personen.index(person), zeiten.index(zeit)] = anzahl
+            werte[:, -1] = werte[:, :-1].sum(axis=1)
+            self._result = pd.DataFrame(werte, index=pd.Index(personen, name="Person"), columns=zeiten + ["Total"])
+            self._key = version
+            return self._result
+
+
+# Prozessweit, von allen Sessions geteilt; version z. B. data_version(sha)
+_kontrollen = Kontrollstatistik()
+_einsatz = Einsatzstatistik()
+
+
+def kontrollstatistik(kontrollen, ferien_start, ferien_ende, version=None):
+    return _kontrollen.update(kontrollen, ferien_start, ferien_ende, version)
+
+
+def einsatzstatistik(planung, version=None):
+    return _einsatz.update(planung, version)
@@ -0,0 +1,142 @@
+import hashlib
+import html
+import io
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# === Mitarbeiter-Avatare ===
+AVATARS = {
+    "Aniko": "avatars/aniko.png",
+    "Daniela": "avatars/daniela.png",
+    "Debora": "avatars/debora.png",
+    "Janine": "avatars/janine.png",
+    "Sarah": "avatars/sarah.png",
+    "Susanne": "avatars/susanne.png"
+}
+
+SIZES = (30, 40, 100)  # Slots, Tageskarten, Wochenverantwortung
+
+
+@lru_cache(maxsize=None)
+def default_format():
+    # Pillow erst hier laden: Seiten, die nur AVATARS brauchen, kommen ohne aus
+    from PIL import features
+
+    return "WEBP" if features.check("webp") else "PNG"
+
+
+# Von Streamlit unter app/static/ ausgeliefert (server.enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = ROOT / "static"
+STATIC_URL = "app/static"
+
+# (Datei, Grösse, Format) -> (mtime, Bytes); gilt für alle Sessions
+_cache = {}
+_lock = threading.Lock()
+
+
+def _render(path, size, fmt):
+    from PIL import Image
+
+    with Image.open(path) as im:
+        im = im.convert("RGBA")
+        # Quadratisch aus der Mitte schneiden (wie object-fit: cover), dann verkleinern
+        side = min(im.size)
+        left, top = (im.width - side) // 2, (im.height - side) // 2
+        im = im.crop((left, top, left + side, top + side)).resize((size, size), Image.LANCZOS)
+        return _encode(im, fmt)
+
+
+def _encode(im, fmt):
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        im.save(buf, fmt, quality=85, method=6)
+    else:
+        im.save(buf, fmt, optimize=True)
+    return buf.getvalue()
+
+
+def _get(name, size, fmt):
+    path = ROOT / AVATARS.get(name, name)
+    mtime = path.stat().st_mtime_ns
+    key = (str(path), size, fmt)
+    with _lock:
+        eintrag = _cache.get(key)
+    if eintrag and eintrag[0] == mtime:
+        return eintrag
+    # Nur beim ersten Aufruf oder nach einer Änderung der Datei neu rechnen
+    eintrag = (mtime, _render(path, size, fmt))
+    with _lock:
+        _cache[key] = eintrag
+    return eintrag
+
+
+def thumbnail(name, size, fmt=None):
+    # Kleines Vorschaubild als Bytes, z. B. für st.image
+    return _get(name, size, fmt or default_format())[1]
+
+
+def css_class(name):
+    return f"avatar-{name.lower()}"
+
+
+_sprites = {}  # (Grösse, Format) -> (mtimes der Quellbilder, CSS)
+
+
+def _write_static(filename, raw):
+    # Nur schreiben, wenn sich der Inhalt geändert hat; atomar ersetzen
+    target = STATIC_DIR / filename
+    try:
+        if target.read_bytes() == raw:
+            return
+    except FileNotFoundError:
+        pass
+    STATIC_DIR.mkdir(exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(raw)
+    os.replace(tmp, target)
+
+
+def sprite_css(size=30, fmt=None):
+    # Alle Avatare nebeneinander in einem Bild, eine CSS-Klasse pro Person.
+    # Das ?v=<Hash> in der URL lässt den Browser das Bild dauerhaft cachen:
+    # neue Version -> neue URL, sonst wird es genau einmal geladen.
+    fmt = fmt or default_format()
+    mtimes = tuple((ROOT / path).stat().st_mtime_ns for path in AVATARS.values())
+    with _lock:
+        eintrag = _sprites.get((size, fmt))
+    if eintrag and eintrag[0] == mtimes:
+        return eintrag[1]
+    from PIL import Image
+
+    sheet = Image.new("RGBA", (size * len(AVATARS), size))
+    for i, name in enumerate(AVATARS):
+        with Image.open(io.BytesIO(thumbnail(name, size, "PNG"))) as tile:
+            sheet.paste(tile, (i * size, 0))
+    raw = _encode(sheet, fmt)
+    filename = f"avatars-{size}.{fmt.lower()}"
+    _write_static(filename, raw)
+    version = hashlib.sha1(raw).hexdigest()[:10]
+    rules = [
+        f".avatar-{size}{{display:inline-block; width:{size}px; height:{size}px; border-radius:50%; "
+        f"background:url('{STATIC_URL}/{filename}?v={version}') no-repeat; "
+        f"background-size:{size * len(AVATARS)}px {size}px;}}"
+    ]
+    rules += [
+        f".avatar-{size}.{css_class(name)}{{background-position:-{i * size}px 0;}}"
+        for i, name in enumerate(AVATARS)
+    ]
+    css = "<style>" + "\n".join(rules) + "</style>"
+    with _lock:
+        _sprites[(size, fmt)] = (mtimes, css)
+    return css
+
+
+def avatar_html(name, style="", size=30):
+    # Verweist nur auf die CSS-Klassen; das Bild selbst steckt im Sprite (sprite_css(size))
+    # name kommt aus den Daten: für die Attribute escapen
+    klasse = html.escape(css_class(name), quote=True)
+    return f"<span class='avatar-{size} {klasse}' title='{html.escape(name, quote=True)}' style='{style}'></span>"
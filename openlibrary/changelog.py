@@ -0,0 +1,123 @@
+import copy
+import json
+from datetime import datetime
+
+from .merge import RECORD_SECTIONS, ShaConflict
+
+# Nach so vielen Ereignissen im Log wird ein neuer Snapshot geschrieben
+COMPACT_EVERY = 50
+
+
+def parse_jsonl(text):
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def dump_jsonl(events):
+    # Eine Zeile pro Ereignis, wie in requests.jsonl
+    return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+
+
+def log_path(path):
+    # kontrollen.json -> kontrollen.log.jsonl
+    stem = path[:-len(".json")] if path.endswith(".json") else path
+    return f"{stem}.log.jsonl"
+
+
+def _records(doc):
+    # (section, key) -> Wert; section None für Einträge der obersten Ebene
+    records = {}
+    for key, value in doc.items():
+        if key in RECORD_SECTIONS and isinstance(value, dict):
+            records.update({(key, k): v for k, v in value.items()})
+        else:
+            records[(None, key)] = value
+    return records
+
+
+def diff_events(base, new):
+    ts = datetime.now().isoformat(timespec="seconds")
+    old_records, new_records = _records(base), _records(new)
+    events = []
+    for (section, key), value in new_records.items():
+        if old_records.get((section, key), object()) != value:
+            events.append({"ts": ts, "op": "set", "section": section, "key": key, "value": value})
+    for section, key in old_records.keys() - new_records.keys():
+        events.append({"ts": ts, "op": "del", "section": section, "key": key})
+    # Neu angelegte Abschnitte ohne Einträge trotzdem erhalten
+    for key in RECORD_SECTIONS:
+        if isinstance(new.get(key), dict) and key not in base:
+            events.insert(0, {"ts": ts, "op": "set", "section": None, "key": key, "value": {}})
+    return events
+
+
+def changed_records(base, new):
+    # Geänderte Einträge im gleichen Format wie die Konflikt-Schlüssel ("kontrollen/2025-07-01")
+    old_records, new_records = _records(base), _records(new)
+    changed = {k for k in old_records.keys() | new_records.keys()
+               if old_records.get(k, object()) != new_records.get(k, object())}
+    return sorted(key if section is None else f"{section}/{key}" for section, key in changed)
+
+
+def apply_events(doc, events):
+    # Ereignisse enthalten absolute Werte: mehrfaches Anwenden ist unschädlich
+    doc = copy.deepcopy(doc)
+    for event in events:
+        target = doc if event["section"] is None else doc.setdefault(event["section"], {})
+        if event["op"] == "set":
+            target[event["key"]] = copy.deepcopy(event["value"])
+        else:
+            target.pop(event["key"], None)
+    return doc
+
+
+def _token(snap_sha, log_sha, count):
+    return f"{snap_sha or ''}|{log_sha or ''}|{count}"
+
+
+def _split(token):
+    if not token:
+        return None, None, 0
+    snap_sha, log_sha, count = token.split("|")
+    return snap_sha or None, log_sha or None, int(count)
+
+
+class ChangeLogStorage:
+    # Speichermodus "changelog": Änderungen als kleine Ereignisse an <name>.log.jsonl anhängen,
+    # gelegentlich zu einem Snapshot in <name>.json verdichten.
+    # Das "sha" nach aussen ist ein Token aus Snapshot-sha, Log-Version und Anzahl Ereignisse.
+    def __init__(self, backend, versions, compact_every=COMPACT_EVERY):
+        self.backend = backend
+        self.versions = versions
+        self.compact_every = compact_every
+        self.name = f"{backend.name}+changelog"
+
+    def read(self, path, fresh=False):
+        snapshot, snap_sha = self.backend.read(path, fresh=fresh)
+        events, log_sha = self.backend.read_lines(log_path(path), fresh=fresh)
+        return apply_events(snapshot, events), _token(snap_sha, log_sha, len(events))
+
+    def read_version(self, path, sha):
+        return None
+
+    def write(self, path, data, sha, commit_message):
+        snap_sha, log_sha, count = _split(sha)
+        base = self.versions.get(path, sha)
+        if base is None:
+            base, current = self.read(path, fresh=True)
+            if current != sha:
+                raise ShaConflict(path)
+        events = diff_events(base, data)
+        if not events:
+            return sha
+        log_sha = self.backend.append_lines(log_path(path), events, log_sha, commit_message)
+        count += len(events)
+        if count >= self.compact_every:
+            return self.compact(path, data, snap_sha, log_sha, commit_message)
+        return _token(snap_sha, log_sha, count)
+
+    def compact(self, path, data, snap_sha, log_sha, commit_message):
+        # Erst Snapshot, dann Log leeren. Stirbt der Prozess dazwischen, werden die
+        # Ereignisse beim Laden nochmals angewendet – das ergibt denselben Stand.
+        snap_sha = self.backend.write(path, data, snap_sha, f"{commit_message} (Snapshot)")
+        log_sha = self.backend.truncate_lines(log_path(path), log_sha, f"{commit_message} (Log geleert)")
+        return _token(snap_sha, log_sha, 0)
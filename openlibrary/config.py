@@ -0,0 +1,30 @@
+import os
+from datetime import date
+
+#Repo-Infos
+GITHUB_USER = "DST81"
+REPO_NAME = "openlibrary-kontrolle"
+BRANCH = "main"
+KONTROLLEN_PATH = "kontrollen.json"
+PLANUNG_PATH = "arbeitsplan.json"
+
+# Ferienzeitraum (hier anpassen)
+FERIEN_START = date(2026, 6, 15)
+FERIEN_ENDE = date(2026, 8, 10)
+
+
+def setting(name, default=None):
+    # Umgebungsvariable (OPENLIBRARY_<NAME>) hat Vorrang vor st.secrets
+    env_value = os.environ.get(f"OPENLIBRARY_{name.upper()}")
+    if env_value is not None:
+        return env_value
+    try:
+        import streamlit as st
+        return st.secrets.get(name, default)
+    except Exception:
+        # keine secrets.toml vorhanden
+        return default
+
+
+def github_token():
+    return setting("github_token")
@@ -0,0 +1,157 @@
+import copy
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from .avatars import AVATARS
+from .scheduler import ALWAYS_ACTIVE_SLOTS, ZEITEN
+
+# Ungefähre Zeiten der Slots in Minuten, um Klassenbesuche aus dem Freitext zuzuordnen
+SLOT_ZEITEN = {"Morgen": (0, 12 * 60), "Nachmittag": (12 * 60, 18 * 60)}
+DAUER = 60  # Klassenbesuche ohne Endzeit ("7.35 B1a") gelten eine Stunde
+
+# "14:15-15:00", "11.20-11.55", "9:00", "17 Uhr", "14-15 Uhr"; eine Zahl allein ist keine Uhrzeit
+_UHRZEIT = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?(?:\s*-\s*(\d{1,2})(?:[:.](\d{2}))?)?(\s*Uhr\b)?")
+_NAMEN = re.compile(r"\b(" + "|".join(map(re.escape, AVATARS)) + r")\b", re.IGNORECASE)
+_KANONISCH = {name.lower(): name for name in AVATARS}
+
+
+@dataclass(frozen=True)
+class Termin:
+    text: str
+    personen: frozenset  # im Text genannte Mitarbeiterinnen
+    zeiten: tuple  # Slots, die der Termin überschneidet
+
+
+@dataclass(frozen=True)
+class Konflikt:
+    tag: date
+    zeit: str
+    person: str
+    termin: str
+
+
+@dataclass
+class Bericht:
+    luecken: list = field(default_factory=list)  # [(Datum, Zeit)] aktiv, aber niemand eingeteilt
+    konflikte: list = field(default_factory=list)  # [Konflikt]
+
+    def __bool__(self):
+        return bool(self.luecken or self.konflikte)
+
+
+def uhrzeit(text):
+    # -> (von, bis) in Minuten oder None, wenn der Text keine Uhrzeit enthält
+    for match in _UHRZEIT.finditer(text):
+        h1, m1, h2, m2, uhr = match.groups()
+        if not (m1 or m2 or uhr) or int(h1) > 23 or (h2 and int(h2) > 23):
+            continue
+        von = int(h1) * 60 + int(m1 or 0)
+        bis = int(h2) * 60 + int(m2 or 0) if h2 else von + DAUER
+        return von, bis
+    return None
+
+
+def termine(eintrag):
+    # Klassenbesuch eines Tages -> Termin mit den genannten Personen. Die Bemerkung ist
+    # Freitext ("Janine kommt ab ca. 17 Uhr") und zählt nicht als Termin.
+    text = eintrag.get("klassenbesuch")
+    if not text:
+        return []
+    personen = frozenset(_KANONISCH[m.lower()] for m in _NAMEN.findall(text))
+    if not personen:
+        return []
+    zeit = uhrzeit(text)
+    if zeit:
+        von, bis = zeit
+        zeiten = tuple(z for z, (a, b) in SLOT_ZEITEN.items() if von < b and a < bis)
+    else:
+        # Klassenbesuch ohne Uhrzeit: betrifft den ganzen Tag
+        zeiten = tuple(ZEITEN)
+    return [Termin(text.strip(), personen, zeiten)]
+
+
+class CoverageIndex:
+    # Index über den Arbeitsplan: (Datum, Zeit) -> Personen, Person -> Slots und
+    # Klassenbesuche pro Tag. sync() gleicht nur die Tage im angefragten Zeitraum ab und
+    # indexiert nur, was sich geändert hat; mit version passiert bei gleichem
+    # Datenstand gar nichts. Ein Rerun der Wochenansicht kostet so sieben Vergleiche,
+    # nicht einen Durchlauf durch das ganze arbeitsplan.json.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tage = {}  # Datumsschlüssel -> zuletzt indexierter Eintrag
+        self._slots = {}  # (Datum, Zeit) -> Personen
+        self._personen = {}  # Person -> {(Datum, Zeit)}
+        self._termine = {}  # Datum -> [Termin]
+        self._synced = {}  # (von, bis) -> version
+
+    def _index(self, tag, eintrag):
+        # Aufrufer hält self._lock
+        tag_str = tag.isoformat()
+        for zeit in ZEITEN:
+            for person in self._slots.pop((tag, zeit), ()):
+                self._personen.get(person, set()).discard((tag, zeit))
+        self._termine.pop(tag, None)
+        if eintrag is None:
+            self._tage.pop(tag_str, None)
+            return
+        self._tage[tag_str] = copy.deepcopy(eintrag)
+        for zeit, personen in (eintrag.get("oeffnungszeiten") or {}).items():
+            if personen:
+                self._slots[(tag, zeit)] = tuple(personen)
+                for person in personen:
+                    self._personen.setdefault(person, set()).add((tag, zeit))
+        if eintrag.get("klassenbesuch"):
+            self._termine[tag] = termine(eintrag)
+
+    def sync(self, planung, von, bis, version=None):
+        with self._lock:
+            if version is not None and self._synced.get((von, bis)) == version:
+                return
+            for i in range((bis - von).days + 1):
+                tag = von + timedelta(days=i)
+                eintrag = planung.get(tag.isoformat())
+                if not isinstance(eintrag, dict):
+                    eintrag = None
+                if self._tage.get(tag.isoformat()) != eintrag:
+                    self._index(tag, eintrag)
+            if version is not None:
+                if len(self._synced) > 100:
+                    self._synced.clear()
+                self._synced[(von, bis)] = version
+
+    def slots_of(self, person, von, bis):
+        with self._lock:
+            return sorted(s for s in self._personen.get(person, ()) if von <= s[0] <= bis)
+
+    def report(self, von, bis, aktiv=None):
+        # aktiv(tag, zeit, default) wie bei scheduler.active_slots
+        bericht = Bericht()
+        with self._lock:
+            for i in range((bis - von).days + 1):
+                tag = von + timedelta(days=i)
+                for zeit in ZEITEN:
+                    default = zeit in ALWAYS_ACTIVE_SLOTS.get(tag.weekday(), [])
+                    if (aktiv(tag, zeit, default) if aktiv else default) and not self._slots.get((tag, zeit)):
+                        bericht.luecken.append((tag, zeit))
+                for termin in self._termine.get(tag, ()):
+                    for zeit in termin.zeiten:
+                        for person in self._slots.get((tag, zeit), ()):
+                            if person in termin.personen:
+                                bericht.konflikte.append(Konflikt(tag, zeit, person, termin.text))
+        return bericht
+
+
+# Prozessweit, von allen Sessions geteilt
+_index = CoverageIndex()
+
+
+def check(planung, von, bis, aktiv=None, version=None):
+    # Lücken und Konflikte für einen beliebigen Zeitraum; planung muss ihn abdecken
+    _index.sync(planung, von, bis, version)
+    return _index.report(von, bis, aktiv)
+
+
+def slots_of(person, von, bis):
+    return _index.slots_of(person, von, bis)
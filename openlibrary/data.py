@@ -0,0 +1,168 @@
+import copy
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, TypedDict
+
+from . import config, storage
+from .storage import (  # Seiten importieren alles Nötige von hier
+    StorageUnavailable, data_version, failed_records, pop_conflicts, record_status, retry_failed,
+    save_kontrollen, save_planung, save_planung_and_kontrollen
+)
+
+# Gemeinsame Datenschicht für alle Seiten. Jedes Dokument wird einmal pro Prozess
+# geladen und als Snapshot gehalten; ein Seitenwechsel liest nur den Snapshot.
+# Nach jedem Schreiben ersetzt storage.on_written ihn durch den gespeicherten Stand
+# mit neuem sha, wartende Änderungen kommen weiterhin direkt aus der Warteschlange.
+# Fremde Änderungen direkt auf GitHub werden nach SNAPSHOT_TTL sichtbar.
+SNAPSHOT_TTL = float(config.setting("snapshot_ttl", 300))
+
+LADEFEHLER = (
+    "⚠️ Daten können gerade nicht geladen werden (GitHub nicht erreichbar oder Kontingent aufgebraucht). "
+    "Bitte später neu laden."
+)
+
+OFFLINE = (
+    "📴 GitHub ist gerade nicht erreichbar. Angezeigt wird der zuletzt hier geladene Stand; "
+    "Änderungen werden lokal gesichert und gespeichert, sobald GitHub wieder erreichbar ist."
+)
+
+# Anzeige pro Eintrag, solange er noch nicht bestätigt ist (siehe record_status)
+SPEICHER_STATUS = {
+    "pending": "⏳ wird gespeichert",
+    "failed": "⚠️ nicht gespeichert",
+    "conflict": "⚠️ gleichzeitig geändert",
+}
+
+
+# === Struktur der Dokumente (siehe schema.py) ===
+class Kontrolle(TypedDict):
+    mitarbeiter: str
+    bemerkung: str
+
+
+class KontrollenDokument(TypedDict, total=False):
+    kontrollen: dict[str, Kontrolle]  # "2026-06-15" -> Kontrolle
+    wochenverantwortung: dict[str, str]  # "2026-W25" -> Name
+    planung: dict
+    schema_version: int
+
+
+class PlanungsTag(TypedDict, total=False):
+    oeffnungszeiten: dict[str, list[str]]  # "Morgen"/"Nachmittag" -> Namen
+    klassenbesuch: Optional[str]
+    bemerkung: Optional[str]
+
+
+Planung = dict[str, PlanungsTag]  # "2026-06-15" -> Tag, dazu schema_version
+
+
+@dataclass
+class Snapshot:
+    data: dict
+    sha: Optional[str]
+    von: Optional[date]  # abgedeckter Zeitraum; None = offen bzw. ganzes Dokument
+    bis: Optional[date]
+    geladen: float
+
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def _ranged():
+    return getattr(storage.get_storage(), "ranged", False)
+
+
+def _covers(snapshot, von, bis):
+    if snapshot.von is None and snapshot.bis is None:
+        return True
+    return (
+        von is not None and bis is not None
+        and (snapshot.von is None or snapshot.von <= von)
+        and (snapshot.bis is None or bis <= snapshot.bis)
+    )
+
+
+def _written(path, data, sha):
+    # Gerade geschriebener Stand ist der neue Snapshot. Bei Partitionen kann data nur
+    # einen Ausschnitt enthalten, dann beim nächsten Zugriff neu laden.
+    with _lock:
+        if _ranged():
+            _snapshots.pop(path, None)
+        else:
+            _snapshots[path] = Snapshot(copy.deepcopy(data), sha, None, None, time.monotonic())
+
+
+storage.on_written(_written)
+
+
+def load(path, von=None, bis=None):
+    # -> (data, sha); data ist eine eigene Kopie, die die Seite ändern und speichern darf
+    if storage.get_queue().has_pending(path):
+        # Noch nicht geschriebene Änderungen: wie bisher über die Warteschlange
+        return storage.load_document(path, von, bis)
+    with _lock:
+        snapshot = _snapshots.get(path)
+    if snapshot and time.monotonic() - snapshot.geladen < SNAPSHOT_TTL:
+        if _covers(snapshot, von, bis):
+            return copy.deepcopy(snapshot.data), snapshot.sha
+        if von is not None and bis is not None:
+            # Zeitraum erweitern statt ersetzen, damit der Rückweg zur vorigen Seite nichts kostet
+            von = min(von, snapshot.von) if snapshot.von else None
+            bis = max(bis, snapshot.bis) if snapshot.bis else None
+    data, sha = storage.load_document(path, von, bis)
+    if storage.offline(path):
+        # Lokale Kopie nicht als Snapshot halten: sobald GitHub wieder da ist, neu laden
+        return data, sha
+    if not _ranged():
+        von = bis = None
+    with _lock:
+        _snapshots[path] = Snapshot(copy.deepcopy(data), sha, von, bis, time.monotonic())
+    return data, sha
+
+
+def speicher_hinweise(path):
+    # Oben auf der Seite: gleichzeitige Änderungen und fehlgeschlagenes Speichern melden
+    import streamlit as st
+
+    if storage.offline(path):
+        st.info(OFFLINE)
+
+    # Gleichzeitige Änderungen am selben Tag (der andere Stand wurde behalten)
+    for konflikt in pop_conflicts(path):
+        st.warning(f"⚠️ Gleichzeitig geändert, bitte prüfen: {', '.join(konflikt.keys)}")
+
+    # Gespeichert wird im Hintergrund: Fehler hier melden
+    fehlgeschlagen = failed_records(path)
+    if fehlgeschlagen:
+        st.error(f"⚠️ Speichern fehlgeschlagen: {', '.join(fehlgeschlagen)}")
+        if st.button("🔁 Erneut versuchen", key=f"retry_save_{path}"):
+            retry_failed()
+            st.rerun()
+
+
+def invalidate(path=None):
+    with _lock:
+        if path is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(path, None)
+
+
+# === Zugriff für die Seiten ===
+def load_kontrollen(von=None, bis=None) -> tuple[KontrollenDokument, Optional[str]]:
+    return load(config.KONTROLLEN_PATH, von, bis)
+
+
+def kontrollen(von=None, bis=None) -> dict[str, Kontrolle]:
+    return load_kontrollen(von, bis)[0]["kontrollen"]
+
+
+def wochenverantwortung(von=None, bis=None) -> dict[str, str]:
+    return load_kontrollen(von, bis)[0]["wochenverantwortung"]
+
+
+def load_planung(von=None, bis=None) -> tuple[Planung, Optional[str]]:
+    return load(config.PLANUNG_PATH, von, bis)
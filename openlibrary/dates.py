@@ -0,0 +1,36 @@
+from functools import lru_cache
+
+LOCALE = "de"
+
+# Muster, die die Seiten verwenden
+KURZ = "EEE dd.MM"  # Tageskarten: "Mo. 15.06"
+LANG = "EEE dd.MM.yyyy"  # Auswahllisten und Meldungen: "Mo. 15.06.2026"
+SPALTE = "ccc d.M"  # Spaltenköpfe der Wochenansicht: "Mo 15.6"
+
+WOCHENTAGE = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]  # Index = date.weekday()
+
+CACHE_SIZE = 4096  # reicht für mehrere Jahre Tage mal alle Muster
+
+
+# Babel wird erst beim ersten Formatieren geladen, nicht schon beim Import der Seite
+@lru_cache(maxsize=None)
+def _pattern(pattern):
+    from babel.dates import parse_pattern
+    return parse_pattern(pattern)
+
+
+@lru_cache(maxsize=None)
+def _locale(locale):
+    from babel import Locale
+    return Locale.parse(locale)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(tag_date, pattern=LANG, locale=LOCALE):
+    # Wie babel.dates.format_date, aber Muster und Locale nur einmal aufgelöst
+    # und jedes (Datum, Muster, Locale) nur einmal formatiert; gilt für alle Sessions
+    return _pattern(pattern).apply(tag_date, _locale(locale))
+
+
+def cache_info():
+    return format_date.cache_info()
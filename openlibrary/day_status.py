@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+
+GREEN = "green"  # kontrolliert
+ORANGE = "orange"  # in der Nähe einer Kontrolle
+RED = "red"  # nicht kontrolliert
+NEARBY = 2  # Tage vor und nach einer Kontrolle, die noch als "in der Nähe" gelten
+
+_STATUS = np.array([RED, ORANGE, GREEN])
+
+# (version, start, end) -> {date: Status}; gilt für alle Sessions
+_cache = OrderedDict()
+_lock = threading.Lock()
+CACHE_SIZE = 32
+
+
+def controlled_array(kontrollen, start, end):
+    # Bool-Array über start..end (inklusive): True, wenn an dem Tag kontrolliert wurde
+    start64 = np.datetime64(start, "D")
+    n = (end - start).days + 1
+    keys = []
+    for key in kontrollen:
+        try:
+            date.fromisoformat(key)
+            keys.append(key)
+        except ValueError:
+            pass  # Schlüssel ist kein Datum
+    offsets = (np.array(keys, dtype="datetime64[D]") - start64).astype(int)
+    controlled = np.zeros(n, dtype=bool)
+    controlled[offsets[(offsets >= 0) & (offsets < n)]] = True
+    return controlled
+
+
+def compute(kontrollen, start, end):
+    # Alle Tage in einem Durchgang: Nachbarschaft per Faltung mit einem Fenster von ±NEARBY Tagen
+    margin = timedelta(days=NEARBY)
+    controlled = controlled_array(kontrollen, start - margin, end + margin)
+    nearby = np.convolve(controlled, np.ones(2 * NEARBY + 1, dtype=int), mode="valid") > 0
+    inner = controlled[NEARBY:len(controlled) - NEARBY]
+    codes = np.where(inner, 2, np.where(nearby, 1, 0))
+    return {start + timedelta(days=i): status for i, status in enumerate(_STATUS[codes].tolist())}
+
+
+def day_status(kontrollen, start, end, version=None):
+    # -> {date: "green" | "orange" | "red"}; mit version (z. B. data_version(sha)) gemerkt
+    if end < start:
+        return {}
+    if version is None:
+        return compute(kontrollen, start, end)
+    key = (version, start, end)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = compute(kontrollen, start, end)
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
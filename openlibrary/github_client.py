@@ -0,0 +1,116 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from . import config
+
+# requests/urllib3 und PyGithub werden erst geladen, wenn wirklich mit GitHub gesprochen
+# wird: Seiten mit lokalem Speicher und die Admin-Seite starten so ohne sie.
+
+POOL_SIZE = 10
+LOW_QUOTA = 100  # ab so wenigen verbleibenden Anfragen wird gebremst und aus dem Cache gelesen
+
+_lock = threading.Lock()
+_session = None
+_repo = None
+
+
+class GithubUnavailable(Exception):
+    # Vorübergehender Fehler (Netz, 5xx, Kontingent) – nicht mit einer leeren Datei verwechseln
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Sekunden bis zum sinnvollen nächsten Versuch
+
+
+class RateLimitExceeded(GithubUnavailable):
+    pass
+
+
+@dataclass
+class Quota:
+    limit: int = None
+    remaining: int = None
+    reset: float = None  # Unix-Zeit, zu der das Kontingent zurückgesetzt wird
+    requests: int = 0  # Antworten, die dieser Prozess gesehen hat
+    updated: float = None
+
+
+_quota = Quota()
+_quota_lock = threading.Lock()
+
+
+def track(headers):
+    # X-RateLimit-* aus jeder Antwort übernehmen, egal ob über requests oder PyGithub
+    headers = {k.lower(): v for k, v in headers.items()}
+    with _quota_lock:
+        _quota.requests += 1
+        if "x-ratelimit-remaining" in headers:
+            _quota.limit = int(headers.get("x-ratelimit-limit", 0))
+            _quota.remaining = int(headers["x-ratelimit-remaining"])
+            _quota.reset = float(headers.get("x-ratelimit-reset", 0))
+            _quota.updated = time.time()
+
+
+def quota():
+    with _quota_lock:
+        return replace(_quota)
+
+
+def seconds_to_reset():
+    q = quota()
+    return max(0.0, (q.reset or 0) - time.time())
+
+
+def quota_low():
+    q = quota()
+    return q.remaining is not None and q.remaining < LOW_QUOTA and seconds_to_reset() > 0
+
+
+def throttle_delay():
+    # Bei knappem Kontingent die restlichen Anfragen bis zum Reset verteilen
+    if not quota_low():
+        return 0
+    remaining = quota().remaining
+    return seconds_to_reset() if remaining <= 0 else seconds_to_reset() / remaining
+
+
+def _retry():
+    # Nur lesende Anfragen automatisch wiederholen, damit kein Commit doppelt entsteht
+    from urllib3.util.retry import Retry
+    return Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+    )
+
+
+def get_session():
+    # Eine HTTP-Session pro Prozess: Keep-Alive statt neuem TLS-Handshake pro Rerun
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=_retry())
+            session.mount("https://", adapter)
+            session.hooks["response"].append(lambda response, *args, **kwargs: track(response.headers))
+            session.headers.update({
+                "Accept": "application/vnd.github+json",
+                "Authorization": f"token {config.github_token()}",
+            })
+            _session = session
+        return _session
+
+
+def get_repo():
+    # Gemeinsames Repo-Handle für alle Seiten und Sessions. lazy=True spart die
+    # Aufrufe von get_user/get_repo – die erste echte Anfrage ist der Schreibzugriff.
+    global _repo
+    with _lock:
+        if _repo is None:
+            from github import Github
+            g = Github(config.github_token(), retry=_retry(), pool_size=POOL_SIZE)
+            _repo = g.get_repo(f"{config.GITHUB_USER}/{config.REPO_NAME}", lazy=True)
+        return _repo
@@ -0,0 +1,213 @@
+import base64
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from . import config, github_client
+from .github_client import GithubUnavailable, RateLimitExceeded
+from .merge import ShaConflict
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://api.github.com"
+CACHE_TTL = 30  # Sekunden, in denen ohne Rückfrage bei GitHub gelesen wird
+
+
+@dataclass
+class CacheEintrag:
+    data: dict
+    sha: str
+    etag: str
+    geholt: float
+
+
+# Prozessweiter Cache: gilt für alle Seiten und Sessions
+_cache = {}
+_lock = threading.Lock()
+
+
+# Zuletzt selbst erzeugter Commit: (commit_sha, tree_sha, {path: blob_sha})
+_head = None
+
+
+def repo_url(suffix):
+    return f"{API_URL}/repos/{config.GITHUB_USER}/{config.REPO_NAME}/{suffix}"
+
+
+def contents_url(path):
+    return repo_url(f"contents/{path}")
+
+
+def blob_sha(raw):
+    # Gleiche Prüfsumme wie git/GitHub für denselben Dateiinhalt
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+
+
+def _unavailable(response):
+    # Fehlerantwort -> passende Ausnahme; 403/429 mit leerem Kontingent heisst warten bis zum Reset
+    if response.status_code in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0":
+        return RateLimitExceeded("GitHub-Kontingent aufgebraucht", github_client.seconds_to_reset())
+    return GithubUnavailable(f"GitHub antwortet mit {response.status_code}")
+
+
+def _check(response):
+    if response.status_code >= 400:
+        raise _unavailable(response)
+
+
+def _stale(path, eintrag, error):
+    # Lieber den letzten bekannten Stand zeigen als ein leeres Dokument
+    if eintrag is None:
+        raise error
+    logger.warning("%s: %s – zeige Stand aus dem Cache", path, error)
+    return copy.deepcopy(eintrag.data), eintrag.sha
+
+
+def load_json(path, ttl=CACHE_TTL, parse=json.loads):
+    with _lock:
+        eintrag = _cache.get(path)
+    if eintrag and time.monotonic() - eintrag.geholt < ttl:
+        return copy.deepcopy(eintrag.data), eintrag.sha
+    if eintrag and ttl > 0 and github_client.quota_low():
+        # Kontingent knapp: bis zum Reset aus dem Cache lesen
+        return copy.deepcopy(eintrag.data), eintrag.sha
+
+    # Bedingte Anfrage: unveränderte Datei kostet nur ein 304 ohne Parsen
+    headers = {"If-None-Match": eintrag.etag} if eintrag and eintrag.etag else {}
+    import requests  # schon geladen, sobald get_session() einmal lief
+    try:
+        response = github_client.get_session().get(
+            contents_url(path), params={"ref": config.BRANCH}, headers=headers, timeout=10
+        )
+    except requests.RequestException as e:
+        return _stale(path, eintrag, GithubUnavailable(f"GitHub nicht erreichbar: {e}"))
+    if response.status_code == 304 and eintrag:
+        eintrag.geholt = time.monotonic()
+        return copy.deepcopy(eintrag.data), eintrag.sha
+    if response.status_code == 404:
+        raise FileNotFoundError(path)
+    if response.status_code >= 400:
+        return _stale(path, eintrag, _unavailable(response))
+
+    inhalt = response.json()
+    sha = inhalt["sha"]
+    if eintrag and eintrag.sha == sha:
+        # Gleicher Blob, nur neues ETag – nicht neu parsen
+        data = eintrag.data
+    else:
+        data = parse(base64.b64decode(inhalt["content"]).decode())
+    with _lock:
+        _cache[path] = CacheEintrag(data, sha, response.headers.get("ETag"), time.monotonic())
+    return copy.deepcopy(data), sha
+
+
+def store(path, data, sha):
+    # Gerade geschriebenen Stand übernehmen, damit der nächste Rerun nichts holen muss
+    with _lock:
+        _cache[path] = CacheEintrag(copy.deepcopy(data), sha, None, time.monotonic())
+
+
+def dump_json(data):
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def save_json(repo, path, data, sha, commit_message, dump=dump_json):
+    # PyGithub nur fürs Schreiben über die Contents-API; Lesen läuft über requests
+    from github.GithubException import GithubException, RateLimitExceededException
+    new_content = dump(data)
+    try:
+        if sha:
+            result = repo.update_file(path, commit_message, new_content, sha, branch=config.BRANCH)
+        else:
+            result = repo.create_file(path, commit_message, new_content, branch=config.BRANCH)
+    except RateLimitExceededException as e:
+        raise RateLimitExceeded("GitHub-Kontingent aufgebraucht", github_client.seconds_to_reset()) from e
+    except GithubException as e:
+        # 409: sha veraltet, 422: Datei existiert bereits (create ohne sha)
+        if e.status == 409 or (e.status == 422 and not sha):
+            invalidate(path)
+            raise ShaConflict(path) from e
+        raise
+    github_client.track(result["commit"].raw_headers)
+    # Neues sha steht direkt in der Antwort, kein zusätzliches get_contents nötig
+    new_sha = result["content"].sha
+    store(path, data, new_sha)
+    return new_sha
+
+
+def save_many(files, commit_message, dump=dump_json):
+    # files: {path: (data, sha)} -> {path: neues sha}
+    # Alle Dateien in einem Commit über die Git-Data-API (Tree, Commit, Ref).
+    # Der Ref wird ohne force nachgeführt: hat sich der Branch seit dem Lesen
+    # bewegt, lehnt GitHub ab (Compare-and-swap auf den Eltern-Commit).
+    global _head
+    session = github_client.get_session()
+    response = session.get(repo_url(f"git/ref/heads/{config.BRANCH}"), timeout=10)
+    _check(response)
+    parent = response.json()["object"]["sha"]
+
+    if _head and _head[0] == parent:
+        # Branch steht noch auf unserem letzten Commit: Tree ist bekannt
+        _, tree_sha, blobs = _head
+    else:
+        response = session.get(repo_url(f"git/trees/{parent}"), params={"recursive": "1"}, timeout=10)
+        _check(response)
+        tree = response.json()
+        tree_sha = tree["sha"]
+        blobs = {e["path"]: e["sha"] for e in tree["tree"] if e["type"] == "blob"}
+    for path, (_, sha) in files.items():
+        if blobs.get(path) != sha:
+            invalidate(path)
+            raise ShaConflict(path)
+
+    contents = {path: dump(data) for path, (data, _) in files.items()}
+    response = session.post(repo_url("git/trees"), json={
+        "base_tree": tree_sha,
+        "tree": [{"path": p, "mode": "100644", "type": "blob", "content": c} for p, c in contents.items()],
+    }, timeout=10)
+    _check(response)
+    new_tree = response.json()["sha"]
+    response = session.post(repo_url("git/commits"), json={
+        "message": commit_message, "tree": new_tree, "parents": [parent],
+    }, timeout=10)
+    _check(response)
+    commit = response.json()["sha"]
+    response = session.patch(repo_url(f"git/refs/heads/{config.BRANCH}"), json={"sha": commit, "force": False}, timeout=10)
+    if response.status_code in (409, 422):
+        # Jemand anderes hat inzwischen committet
+        raise ShaConflict(f"heads/{config.BRANCH}")
+    _check(response)
+
+    new_shas = {path: blob_sha(c.encode()) for path, c in contents.items()}
+    _head = (commit, new_tree, {**blobs, **new_shas})
+    for path, (data, _) in files.items():
+        store(path, data, new_shas[path])
+    return new_shas
+
+
+def load_blob_json(repo, sha):
+    # Älteren Stand über das Blob-sha holen (Basis für den Merge)
+    blob = repo.get_git_blob(sha)
+    return json.loads(base64.b64decode(blob.content).decode())
+
+
+def cache_info():
+    # Für die Admin-Seite: was liegt wie lange im Cache
+    now = time.monotonic()
+    with _lock:
+        return [
+            {"Datei": path, "sha": e.sha[:7] if e.sha else "", "Alter (s)": int(now - e.geholt)}
+            for path, e in sorted(_cache.items())
+        ]
+
+
+def invalidate(path=None):
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(path, None)
@@ -0,0 +1,75 @@
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .changelog import dump_jsonl, parse_jsonl
+
+
+class Journal:
+    # Write-Ahead-Journal: jede Änderung steht fsync'ed auf der lokalen Platte, bevor sie
+    # an GitHub (oder ein anderes Backend) geht. Eine Zeile pro Änderung:
+    #   {"id": 7, "ts": ..., "path": "kontrollen.json", "sha": <Basis>, "events": [...]}
+    # und nach dem Schreiben {"done": [7, 8]}. Sind alle erledigt, wird die Datei geleert.
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        lines = self._lines()
+        self._open = {e["id"] for e in self._entries(lines)}
+        # Höchste id in der ganzen Datei, auch aus "done"-Zeilen: eine wiederverwendete
+        # id gälte nach dem nächsten Neustart schon als erledigt
+        ids = [line["id"] for line in lines if "id" in line] + [i for line in lines for i in line.get("done", [])]
+        self._next = max(ids, default=0) + 1
+
+    def _lines(self):
+        try:
+            return parse_jsonl(self.path.read_text())
+        except FileNotFoundError:
+            return []
+
+    def _entries(self, lines=None):
+        lines = self._lines() if lines is None else lines
+        done = {i for line in lines for i in line.get("done", [])}
+        return [line for line in lines if "id" in line and line["id"] not in done]
+
+    def _append(self, lines):
+        # Aufrufer hält self._lock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(dump_jsonl(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, path, sha, events):
+        # -> id des Eintrags; kehrt erst zurück, wenn er sicher auf der Platte steht
+        with self._lock:
+            entry_id = self._next
+            self._next += 1
+            self._append([{
+                "id": entry_id,
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "path": path,
+                "sha": sha,
+                "events": events,
+            }])
+            self._open.add(entry_id)
+        return entry_id
+
+    def mark_done(self, ids):
+        ids = [i for i in ids if i in self._open]
+        if not ids:
+            return
+        with self._lock:
+            self._open -= set(ids)
+            if self._open:
+                self._append([{"done": ids}])
+            else:
+                # Nichts mehr offen: Journal leeren statt endlos wachsen lassen
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_text("")
+                os.replace(tmp, self.path)
+
+    def pending(self):
+        # Offene Einträge in der Reihenfolge, in der sie geschrieben wurden
+        with self._lock:
+            return [e for e in self._entries() if e["id"] in self._open]
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+# Abschnitte, deren Einträge (Datums- bzw. KW-Schlüssel) einzeln gemergt werden.
+# Alle anderen Schlüssel der obersten Ebene gelten selbst als Eintrag
+# (z. B. die Datumsschlüssel in arbeitsplan.json).
+RECORD_SECTIONS = ("kontrollen", "wochenverantwortung", "planung")
+
+_MISSING = object()
+
+
+class ShaConflict(Exception):
+    # Das gespeicherte Dokument hat sich seit dem übergebenen sha geändert
+    def __init__(self, path):
+        super().__init__(f"{path} wurde zwischenzeitlich geändert")
+        self.path = path
+
+
+class MergeConflict(Exception):
+    # Gleicher Eintrag von beiden Seiten unterschiedlich geändert.
+    # Gespeichert ist trotzdem der Merge, bei den Konflikten mit dem fremden Stand.
+    def __init__(self, path, keys, sha):
+        super().__init__(f"Konflikt in {path}: {', '.join(keys)}")
+        self.path = path
+        self.keys = keys
+        self.sha = sha
+
+
+def _merge_records(base, ours, theirs, prefix, conflicts):
+    merged = dict(theirs)
+    for key in sorted(set(base) | set(ours) | set(theirs)):
+        b = base.get(key, _MISSING)
+        o = ours.get(key, _MISSING)
+        t = theirs.get(key, _MISSING)
+        if o == b:
+            continue  # wir haben nichts geändert, fremder Stand gilt
+        if t == b or t == o:
+            if o is _MISSING:
+                merged.pop(key, None)
+            else:
+                merged[key] = o
+        else:
+            conflicts.append(prefix + key)
+    return merged
+
+
+def merge_document(base, ours, theirs):
+    # -> (gemergtes Dokument, Liste der Konflikt-Schlüssel)
+    conflicts = []
+    sections = {
+        key for key in RECORD_SECTIONS
+        if all(isinstance(doc.get(key, {}), dict) for doc in (base, ours, theirs))
+    }
+    flat = lambda doc: {k: v for k, v in doc.items() if k not in sections}
+    merged = _merge_records(flat(base), flat(ours), flat(theirs), "", conflicts)
+    for key in sorted(sections):
+        if key in base or key in ours or key in theirs:
+            merged[key] = _merge_records(
+                base.get(key, {}), ours.get(key, {}), theirs.get(key, {}), f"{key}/", conflicts
+            )
+    return merged, conflicts
+
+
+class VersionStore:
+    # Zuletzt gesehene Stände je (path, sha) als Basis für den Drei-Wege-Merge
+    def __init__(self, size=32):
+        self.size = size
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, path, sha, data):
+        if sha is None:
+            return
+        with self._lock:
+            self._versions[(path, sha)] = data
+            self._versions.move_to_end((path, sha))
+            while len(self._versions) > self.size:
+                self._versions.popitem(last=False)
+
+    def get(self, path, sha):
+        with self._lock:
+            return self._versions.get((path, sha))
@@ -0,0 +1,169 @@
+import copy
+from datetime import date
+
+from .merge import RECORD_SECTIONS, ShaConflict
+
+EMPTY = object()
+
+
+def partition_dir(path):
+    # kontrollen.json -> kontrollen/
+    return path[:-len(".json")] if path.endswith(".json") else path
+
+
+def index_path(path):
+    return f"{partition_dir(path)}/index.json"
+
+
+def part_path(path, part):
+    return f"{partition_dir(path)}/{part}.json"
+
+
+def record_date(section, key):
+    # Datum eines Eintrags; None für Schlüssel ohne Datum (z. B. schema_version)
+    try:
+        if section == "wochenverantwortung":
+            year, week = key.split("-W")
+            return date.fromisocalendar(int(year), int(week), 1)
+        return date.fromisoformat(key)
+    except ValueError:
+        return None
+
+
+def partition_of(day, granularity):
+    return str(day.year) if granularity == "year" else f"{day.year}-{day.month:02d}"
+
+
+def partition_range(part):
+    # "2025" -> 1.1.–31.12., "2025-07" -> 1.7.–31.7.
+    if len(part) == 4:
+        return date(int(part), 1, 1), date(int(part), 12, 31)
+    year, month = int(part[:4]), int(part[5:7])
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start, date.fromordinal(end.toordinal() - 1)
+
+
+def split_document(doc, granularity):
+    # -> ({partition: Teil-Dokument}, meta); meta enthält Schlüssel ohne Datum
+    parts, meta = {}, {}
+    for key, value in doc.items():
+        if key in RECORD_SECTIONS and isinstance(value, dict):
+            for record_key, record in value.items():
+                day = record_date(key, record_key)
+                if day is None:
+                    meta.setdefault(key, {})[record_key] = record
+                    continue
+                part = parts.setdefault(partition_of(day, granularity), {})
+                part.setdefault(key, {})[record_key] = record
+            meta.setdefault("sections", []).append(key)
+        else:
+            day = record_date(None, key)
+            if day is None:
+                meta.setdefault("top", {})[key] = value
+            else:
+                parts.setdefault(partition_of(day, granularity), {})[key] = value
+    return parts, meta
+
+
+def join_document(parts, meta):
+    doc = {key: {} for key in meta.get("sections", [])}
+    doc.update(copy.deepcopy(meta.get("top", {})))
+    for key in RECORD_SECTIONS:
+        if key in meta and key in doc:
+            doc[key].update(copy.deepcopy(meta[key]))
+    for part in parts:
+        for key, value in part.items():
+            if key in RECORD_SECTIONS and isinstance(value, dict):
+                doc.setdefault(key, {}).update(copy.deepcopy(value))
+            else:
+                doc[key] = copy.deepcopy(value)
+    return doc
+
+
+def _token(index_sha, part_shas):
+    return ";".join([f"index={index_sha or ''}"] + [f"{p}={s or ''}" for p, s in sorted(part_shas.items())])
+
+
+def _split(token):
+    if not token:
+        return None, {}
+    items = dict(item.split("=", 1) for item in token.split(";"))
+    index_sha = items.pop("index") or None
+    return index_sha, {p: s or None for p, s in items.items()}
+
+
+class PartitionedStorage:
+    # Speichermodus "partitioned": ein Dokument pro Jahr oder Monat plus kleiner Index,
+    # z. B. kontrollen/index.json, kontrollen/2025.json, kontrollen/2026.json.
+    # Geladen werden nur die Partitionen, die den angefragten Zeitraum überlappen.
+    ranged = True
+
+    def __init__(self, backend, versions, granularity="year"):
+        self.backend = backend
+        self.versions = versions
+        self.granularity = granularity
+        self.name = f"{backend.name}+partitioned"
+
+    def _read_part(self, path, part, fresh=False):
+        target = part_path(path, part)
+        data, sha = self.backend.read(target, fresh=fresh)
+        self.versions.remember(target, sha, copy.deepcopy(data))
+        return data, sha
+
+    def read(self, path, fresh=False, von=None, bis=None):
+        index, index_sha = self.backend.read(index_path(path), fresh=fresh)
+        if index_sha is None:
+            # Noch nicht aufgeteilt: bisheriges Einzeldokument lesen, beim ersten Speichern aufteilen
+            doc, _ = self.backend.read(path, fresh=fresh)
+            return doc, _token(None, {})
+        self.versions.remember(index_path(path), index_sha, copy.deepcopy(index))
+        parts, shas = [], {}
+        for part in index.get("partitions", []):
+            start, end = partition_range(part)
+            if (von and end < von) or (bis and start > bis):
+                continue
+            data, shas[part] = self._read_part(path, part, fresh=fresh)
+            parts.append(data)
+        return join_document(parts, index.get("meta", {})), _token(index_sha, shas)
+
+    def read_version(self, path, sha):
+        return None
+
+    def write(self, path, data, sha, commit_message):
+        index_sha, shas = _split(sha)
+        if index_sha is None:
+            index, current_index_sha = self.backend.read(index_path(path), fresh=True)
+            if current_index_sha is not None:
+                raise ShaConflict(path)  # inzwischen von jemand anderem aufgeteilt
+            index = {"granularity": self.granularity, "partitions": [], "meta": {}}
+            # Reste eines abgebrochenen Aufteilens überschreiben statt daran hängenzubleiben
+            for part in split_document(data, self.granularity)[0]:
+                _, existing_sha = self._read_part(path, part, fresh=True)
+                if existing_sha is not None:
+                    shas[part] = existing_sha
+        else:
+            index = self.versions.get(index_path(path), index_sha)
+            if index is None:
+                index, current_index_sha = self.backend.read(index_path(path), fresh=True)
+                if current_index_sha != index_sha:
+                    raise ShaConflict(path)
+        new_parts, meta = split_document(data, self.granularity)
+        for part in sorted(set(new_parts) | set(shas)):
+            new = new_parts.get(part, {})
+            old = EMPTY
+            if part in shas:
+                old = self.versions.get(part_path(path, part), shas[part])
+                if old is None:
+                    old, _ = self._read_part(path, part)
+            if new == old:
+                continue  # nur betroffene Partitionen schreiben
+            # Nicht geladene, aber vorhandene Partition -> ShaConflict und Merge
+            shas[part] = self.backend.write(part_path(path, part), new, shas.get(part), commit_message)
+            self.versions.remember(part_path(path, part), shas[part], copy.deepcopy(new))
+        partitions = sorted(set(index.get("partitions", [])) | set(new_parts))
+        if partitions != index.get("partitions") or meta != index.get("meta"):
+            index = {"granularity": self.granularity, "partitions": partitions, "meta": meta}
+            index_sha = self.backend.write(index_path(path), index, index_sha, commit_message)
+            self.versions.remember(index_path(path), index_sha, copy.deepcopy(index))
+        return _token(index_sha, shas)
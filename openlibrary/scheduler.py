@@ -0,0 +1,108 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Optional
+
+ZEITEN = ["Morgen", "Nachmittag"]
+
+# Feste Öffnungszeiten pro Wochentag (0 = Montag); unabhängig von der Locale, anders als strftime("%A")
+ALWAYS_ACTIVE_SLOTS = {
+    1: ["Nachmittag"],  # Dienstag Nachmittag
+    2: ["Morgen"],  # Mittwoch Morgen
+    3: ["Morgen", "Nachmittag"],  # Donnerstag Morgen + Nachmittag
+    4: ["Morgen"],  # Freitag Morgen
+    5: ["Morgen"],  # Samstag Morgen
+}
+
+
+@dataclass
+class Verfuegbarkeit:
+    wochentage: frozenset = frozenset(range(7))  # 0 = Montag
+    max_schichten: Optional[int] = None  # im geplanten Zeitraum; None = unbegrenzt
+
+
+@dataclass
+class Vorschlag:
+    zuteilung: dict = field(default_factory=dict)  # (Datum, Zeit) -> [Namen]
+    offen: list = field(default_factory=list)  # Slots, für die niemand verfügbar war
+    last: dict = field(default_factory=dict)  # Name -> Schichten inkl. Historie
+
+
+def active_slots(von, bis, aktiv=None):
+    # Alle aktiven (Datum, Zeit) im Zeitraum, chronologisch. aktiv(tag, zeit, default) kann
+    # die festen Öffnungszeiten übersteuern (z. B. die Häkchen auf der Seite).
+    slots = []
+    for i in range((bis - von).days + 1):
+        tag = von + timedelta(days=i)
+        for zeit in ZEITEN:
+            default = zeit in ALWAYS_ACTIVE_SLOTS.get(tag.weekday(), [])
+            if aktiv(tag, zeit, default) if aktiv else default:
+                slots.append((tag, zeit))
+    return slots
+
+
+def history(planung, ausser=()):
+    # Schichten pro Person aus dem bisherigen Arbeitsplan; ausser: (Datumsschlüssel, Zeit), die neu geplant werden
+    zaehler = {}
+    for tag, eintrag in planung.items():
+        if not isinstance(eintrag, dict):
+            continue
+        for zeit, personen in (eintrag.get("oeffnungszeiten") or {}).items():
+            if (tag, zeit) in ausser:
+                continue
+            for person in personen or []:
+                zaehler[person] = zaehler.get(person, 0) + 1
+    return zaehler
+
+
+def plan(planung, slots, personen, verfuegbarkeit=None, pro_slot=1, ueberschreiben=False):
+    # Deterministisch und gierig in zeitlicher Reihenfolge: jeder Slot geht an die
+    # verfügbaren Personen mit den wenigsten Schichten (Historie + bereits verteilt),
+    # bei Gleichstand alphabetisch. Wer den vorherigen Slot hat, kommt nur zum Zug,
+    # wenn sonst niemand frei ist. Bereits eingeteilte Slots bleiben, ausser bei ueberschreiben.
+    verfuegbarkeit = verfuegbarkeit or {}
+    regel = {person: verfuegbarkeit.get(person, Verfuegbarkeit()) for person in personen}
+    neu_geplant = {(tag.isoformat(), zeit) for tag, zeit in slots} if ueberschreiben else ()
+    last = {person: 0 for person in personen}
+    for person, anzahl in history(planung, neu_geplant).items():
+        if person in last:
+            last[person] = anzahl
+    im_zeitraum = dict.fromkeys(personen, 0)
+    vorschlag = Vorschlag(last=last)
+    vorher = set()
+
+    for tag, zeit in slots:
+        bestehend = planung.get(tag.isoformat(), {}).get("oeffnungszeiten", {}).get(zeit) or []
+        if bestehend and not ueberschreiben:
+            # Schon eingeteilt (und in der Historie gezählt): nur für die Nachbarregel merken
+            vorher = set(bestehend)
+            for person in bestehend:
+                if person in im_zeitraum:
+                    im_zeitraum[person] += 1
+            continue
+        frei = [
+            person for person in personen
+            if tag.weekday() in regel[person].wochentage
+            and (regel[person].max_schichten is None or im_zeitraum[person] < regel[person].max_schichten)
+        ]
+        frei.sort(key=lambda person: (person in vorher, last[person], person))
+        gewaehlt = frei[:pro_slot]
+        for person in gewaehlt:
+            last[person] += 1
+            im_zeitraum[person] += 1
+        vorschlag.zuteilung[(tag, zeit)] = gewaehlt
+        if len(gewaehlt) < pro_slot:
+            vorschlag.offen.append((tag, zeit))
+        vorher = set(gewaehlt)
+    return vorschlag
+
+
+def apply(planung, vorschlag):
+    # Vorschlag in den Arbeitsplan übernehmen; Klassenbesuch und Bemerkung bleiben
+    for (tag, zeit), personen in vorschlag.zuteilung.items():
+        eintrag = planung.setdefault(tag.isoformat(), {
+            "oeffnungszeiten": {z: [] for z in ZEITEN},
+            "klassenbesuch": None,
+            "bemerkung": None,
+        })
+        eintrag.setdefault("oeffnungszeiten", {})[zeit] = list(personen)
+    return planung
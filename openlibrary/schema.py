@@ -0,0 +1,71 @@
+from datetime import date
+
+from . import config
+
+# Versionsfeld auf oberster Ebene jedes Dokuments; fehlt es, gilt Version 0
+SCHEMA_KEY = "schema_version"
+
+
+def _is_date(key):
+    try:
+        date.fromisoformat(key)
+        return True
+    except ValueError:
+        return False
+
+
+# === Migrationsschritte: Schritt n hebt ein Dokument von Version n auf n+1 ===
+def _kontrollen_abschnitte(doc):
+    # Alte Struktur mit Datumsschlüsseln auf oberster Ebene -> eigene Abschnitte
+    if "kontrollen" in doc:
+        return doc
+    migrated = {
+        "kontrollen": {k: v for k, v in doc.items() if _is_date(k)},
+        "wochenverantwortung": doc.get("wochenverantwortung", {}),
+    }
+    if "planung" in doc:
+        migrated["planung"] = doc["planung"]
+    return migrated
+
+
+def _kontrollen_planung(doc):
+    # Alle Seiten erwarten die drei Abschnitte
+    for key in ("kontrollen", "wochenverantwortung", "planung"):
+        doc.setdefault(key, {})
+    return doc
+
+
+def _planung_version(doc):
+    # Struktur bleibt (Datumsschlüssel auf oberster Ebene), nur die Version kommt dazu
+    return doc
+
+
+MIGRATIONS = {
+    config.KONTROLLEN_PATH: [_kontrollen_abschnitte, _kontrollen_planung],
+    config.PLANUNG_PATH: [_planung_version],
+}
+
+
+def current_version(path):
+    return len(MIGRATIONS.get(path, []))
+
+
+def needs_migration(path, doc):
+    # Bei jedem Rerun: nur das Versionsfeld vergleichen, keine Schlüssel durchsuchen
+    return doc.get(SCHEMA_KEY, 0) < current_version(path)
+
+
+def migrate(path, doc):
+    # Fehlende Schritte der Reihe nach anwenden
+    version = doc.get(SCHEMA_KEY, 0)
+    for step in MIGRATIONS.get(path, [])[version:]:
+        doc = step(doc)
+        version += 1
+        doc[SCHEMA_KEY] = version
+    return doc
+
+
+def stamp(path, doc):
+    # Seiten, die das Feld nicht kennen, sollen es beim Speichern nicht entfernen
+    doc.setdefault(SCHEMA_KEY, current_version(path))
+    return doc
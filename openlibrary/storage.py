@@ -0,0 +1,628 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from . import config, github_client, github_files, schema
+from .changelog import (
+    COMPACT_EVERY, ChangeLogStorage, apply_events, changed_records, diff_events, dump_jsonl, parse_jsonl
+)
+from .github_files import blob_sha, dump_json
+from .journal import Journal
+from .merge import MergeConflict, ShaConflict, VersionStore, merge_document
+from .partitions import PartitionedStorage
+from .write_behind import FAILED, WriteBehindQueue, stored_sha
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+logger = logging.getLogger(__name__)
+
+
+class StorageUnavailable(Exception):
+    # Dokument konnte nicht gelesen werden (z. B. GitHub nicht erreichbar).
+    # Bewusst kein leeres Dokument: Speichern darauf würde alle Einträge löschen.
+    def __init__(self, path):
+        super().__init__(f"{path} kann gerade nicht geladen werden")
+        self.path = path
+
+
+class Storage:
+    # Schnittstelle, die alle Backends erfüllen
+    name = None
+
+    def read(self, path, fresh=False):
+        # -> (data, sha); ({}, None) wenn das Dokument noch nicht existiert
+        raise NotImplementedError
+
+    def write(self, path, data, sha, commit_message):
+        # -> neues sha; ShaConflict, wenn sha nicht mehr dem gespeicherten Stand entspricht
+        raise NotImplementedError
+
+    def write_many(self, files, commit_message):
+        # files: {path: (data, sha)} -> {path: neues sha}; alle oder keine Datei schreiben.
+        # ShaConflict mit dem betroffenen path, wenn einer der Stände veraltet ist.
+        raise NotImplementedError
+
+    def read_version(self, path, sha):
+        # Älteren Stand laden, falls das Backend das kann
+        return None
+
+    # Für den Speichermodus "changelog": Ereignisse zeilenweise anhängen
+    def read_lines(self, path, fresh=False):
+        # -> (Liste der Ereignisse, Version); ([], None) wenn es kein Log gibt
+        raise NotImplementedError
+
+    def append_lines(self, path, events, sha, commit_message):
+        # -> neue Version; ShaConflict, wenn jemand anderes inzwischen angehängt hat
+        raise NotImplementedError
+
+    def truncate_lines(self, path, sha, commit_message):
+        raise NotImplementedError
+
+
+class GithubStorage(Storage):
+    name = "github"
+
+    @property
+    def repo(self):
+        # Prozessweites Handle; Lesen läuft über die gepoolte Session in github_files
+        return github_client.get_repo()
+
+    def read(self, path, fresh=False):
+        try:
+            return github_files.load_json(path, ttl=0 if fresh else github_files.CACHE_TTL)
+        except FileNotFoundError:
+            return {}, None
+
+    def write(self, path, data, sha, commit_message):
+        return github_files.save_json(self.repo, path, data, sha, commit_message)
+
+    def write_many(self, files, commit_message):
+        return github_files.save_many(files, commit_message)
+
+    def read_version(self, path, sha):
+        try:
+            return github_files.load_blob_json(self.repo, sha)
+        except Exception:
+            return None
+
+    def read_lines(self, path, fresh=False):
+        try:
+            return github_files.load_json(
+                path, ttl=0 if fresh else github_files.CACHE_TTL, parse=parse_jsonl
+            )
+        except FileNotFoundError:
+            return [], None
+
+    def append_lines(self, path, events, sha, commit_message):
+        # Die Contents-API kennt kein Anhängen: das Log wird ganz hochgeladen,
+        # bleibt durch die Verdichtung aber auf wenige Zeilen begrenzt
+        current, current_sha = self.read_lines(path)
+        if current_sha != sha:
+            raise ShaConflict(path)
+        return github_files.save_json(
+            self.repo, path, current + events, sha, commit_message, dump=dump_jsonl
+        )
+
+    def truncate_lines(self, path, sha, commit_message):
+        return github_files.save_json(self.repo, path, [], sha, commit_message, dump=dump_jsonl)
+
+
+class LocalStorage(Storage):
+    # JSON-Dateien im Arbeitsverzeichnis, z. B. für den Kiosk vor Ort
+    name = "local"
+
+    def __init__(self, root=REPO_ROOT):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def read(self, path, fresh=False):
+        try:
+            raw = (self.root / path).read_bytes()
+        except FileNotFoundError:
+            return {}, None
+        return json.loads(raw.decode()), blob_sha(raw)
+
+    def write(self, path, data, sha, commit_message):
+        return self.write_many({path: (data, sha)}, commit_message)[path]
+
+    def write_many(self, files, commit_message):
+        raws = {path: dump_json(data).encode() for path, (data, _) in files.items()}
+        with self._lock:
+            # Erst alle Stände prüfen, dann schreiben
+            for path, (_, sha) in files.items():
+                _, current_sha = self.read(path)
+                if current_sha != sha:
+                    raise ShaConflict(path)
+            for path, raw in raws.items():
+                target = self.root / path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                # Erst in temporäre Datei schreiben, dann atomar ersetzen
+                tmp = target.with_name(target.name + ".tmp")
+                tmp.write_bytes(raw)
+                os.replace(tmp, target)
+        return {path: blob_sha(raw) for path, raw in raws.items()}
+
+    # Version des Logs ist seine Grösse in Bytes: Anhängen bleibt O(1)
+    def read_lines(self, path, fresh=False):
+        try:
+            raw = (self.root / path).read_bytes()
+        except FileNotFoundError:
+            return [], None
+        return parse_jsonl(raw.decode()), str(len(raw))
+
+    def _log_size(self, path):
+        try:
+            return str((self.root / path).stat().st_size)
+        except FileNotFoundError:
+            return None
+
+    def append_lines(self, path, events, sha, commit_message):
+        target = self.root / path
+        with self._lock:
+            if (self._log_size(path) or "0") != (sha or "0"):
+                raise ShaConflict(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "ab") as f:
+                f.write(dump_jsonl(events).encode())
+                f.flush()
+                os.fsync(f.fileno())
+                return str(f.tell())
+
+    def truncate_lines(self, path, sha, commit_message):
+        with self._lock:
+            if (self._log_size(path) or "0") != (sha or "0"):
+                raise ShaConflict(path)
+            (self.root / path).write_bytes(b"")
+        return "0"
+
+
+class SqliteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, db_path, seed_root=REPO_ROOT):
+        self.db_path = str(db_path)
+        self.seed_root = Path(seed_root)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dokumente ("
+                "path TEXT PRIMARY KEY, inhalt TEXT NOT NULL, sha TEXT NOT NULL, geaendert TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ereignisse ("
+                "nr INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT NOT NULL, ereignis TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        # Streamlit führt Sessions in verschiedenen Threads aus: eine Verbindung pro Thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    def read(self, path, fresh=False):
+        row = self._connect().execute(
+            "SELECT inhalt, sha FROM dokumente WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            # Beim ersten Zugriff mit der JSON-Datei aus dem Arbeitsverzeichnis starten
+            return LocalStorage(self.seed_root).read(path)
+        return json.loads(row[0]), row[1]
+
+    def write(self, path, data, sha, commit_message):
+        return self.write_many({path: (data, sha)}, commit_message)[path]
+
+    def write_many(self, files, commit_message):
+        inhalte = {path: dump_json(data) for path, (data, _) in files.items()}
+        new_shas = {path: blob_sha(inhalt.encode()) for path, inhalt in inhalte.items()}
+        with self._connect() as conn:
+            # Sperre sofort holen, damit Prüfen und Schreiben nicht überholt werden
+            conn.execute("BEGIN IMMEDIATE")
+            for path, (_, sha) in files.items():
+                _, current_sha = self.read(path)
+                if current_sha != sha:
+                    raise ShaConflict(path)
+            conn.executemany(
+                "INSERT OR REPLACE INTO dokumente (path, inhalt, sha, geaendert) VALUES (?, ?, ?, ?)",
+                [(path, inhalte[path], new_shas[path], commit_message) for path in files],
+            )
+        return new_shas
+
+    # Version des Logs ist die Nummer des letzten Ereignisses
+    def _last_nr(self, conn, path):
+        row = conn.execute("SELECT MAX(nr) FROM ereignisse WHERE path = ?", (path,)).fetchone()
+        return None if row[0] is None else str(row[0])
+
+    def read_lines(self, path, fresh=False):
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT ereignis FROM ereignisse WHERE path = ? ORDER BY nr", (path,)
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows], self._last_nr(conn, path)
+
+    def append_lines(self, path, events, sha, commit_message):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._last_nr(conn, path) != sha:
+                raise ShaConflict(path)
+            conn.executemany(
+                "INSERT INTO ereignisse (path, ereignis) VALUES (?, ?)",
+                [(path, json.dumps(e, ensure_ascii=False)) for e in events],
+            )
+            return self._last_nr(conn, path)
+
+    def truncate_lines(self, path, sha, commit_message):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._last_nr(conn, path) != sha:
+                raise ShaConflict(path)
+            conn.execute("DELETE FROM ereignisse WHERE path = ?", (path,))
+        return None
+
+
+versions = VersionStore()
+
+
+def create_backend(name=None):
+    name = name or config.setting("storage", "github")
+    if name == "github":
+        return GithubStorage()
+    if name == "local":
+        return LocalStorage(config.setting("local_root", REPO_ROOT))
+    if name == "sqlite":
+        return SqliteStorage(config.setting("sqlite_path", REPO_ROOT / "openlibrary.db"))
+    raise ValueError(f"Unbekanntes Storage-Backend: {name}")
+
+
+def create_storage(name=None, layout=None):
+    backend = create_backend(name)
+    layout = layout or config.setting("layout", "document")
+    if layout == "document":
+        return backend
+    if layout == "changelog":
+        return ChangeLogStorage(
+            backend, versions, compact_every=int(config.setting("compact_every", COMPACT_EVERY))
+        )
+    if layout == "partitioned":
+        return PartitionedStorage(backend, versions, granularity=config.setting("partition", "year"))
+    raise ValueError(f"Unbekannter Speichermodus: {layout}")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+        return _storage
+
+
+def _merge_fresh(storage, path, data, sha):
+    # Aktuellen Stand holen und unsere Änderungen darüberlegen -> (data, sha, Konflikte)
+    theirs, their_sha = storage.read(path, fresh=True)
+    base = {}
+    if sha is not None:
+        # sha kann das Token eines wartenden Stands sein: dann ist genau dieser die Basis
+        base = versions.get(path, sha) or (stored_sha(sha) and storage.read_version(path, stored_sha(sha))) or {}
+    data, conflicts = merge_document(base, data, theirs)
+    versions.remember(path, their_sha, copy.deepcopy(theirs))
+    return data, their_sha, conflicts
+
+
+_written_hooks = []
+
+
+def on_written(callback):
+    # callback(path, data, sha) nach jedem erfolgreichen Schreiben, z. B. für Snapshots
+    _written_hooks.append(callback)
+
+
+def _written(path, data, sha):
+    for callback in _written_hooks:
+        callback(path, data, sha)
+
+
+def write_document(path, data, sha, commit_message, attempts=3):
+    # Optimistisch schreiben; bei veraltetem sha Drei-Wege-Merge auf Eintragsebene
+    storage = get_storage()
+    conflicts = []
+    for _ in range(attempts):
+        try:
+            new_sha = storage.write(path, data, stored_sha(sha), commit_message)
+            break
+        except ShaConflict:
+            data, sha, new_conflicts = _merge_fresh(storage, path, data, sha)
+            conflicts.extend(k for k in new_conflicts if k not in conflicts)
+    else:
+        raise ShaConflict(path)
+    versions.remember(path, new_sha, copy.deepcopy(data))
+    _written(path, data, new_sha)
+    if conflicts:
+        raise MergeConflict(path, conflicts, new_sha)
+    return new_sha
+
+
+def write_documents(files, commit_message, attempts=3):
+    # Mehrere Dokumente in einem Commit: files = {path: (data, sha)}
+    # -> ({path: neues sha}, [MergeConflict, ...])
+    storage = get_storage()
+    if not hasattr(storage, "write_many"):
+        # Speichermodi changelog/partitioned schreiben mehrere Dateien je Dokument: einzeln
+        new_shas, merge_conflicts = {}, []
+        for path, (data, sha) in files.items():
+            try:
+                new_shas[path] = write_document(path, data, sha, commit_message)
+            except MergeConflict as e:
+                new_shas[path] = e.sha
+                merge_conflicts.append(e)
+        return new_shas, merge_conflicts
+    files = dict(files)
+    conflicts = {path: [] for path in files}
+    for _ in range(attempts + len(files)):
+        try:
+            new_shas = storage.write_many(
+                {path: (data, stored_sha(sha)) for path, (data, sha) in files.items()}, commit_message
+            )
+            break
+        except ShaConflict as e:
+            if e.path not in files:
+                continue  # Branch hat sich bewegt, Dateien selbst unverändert: nochmals versuchen
+            data, sha = files[e.path]
+            data, sha, new_conflicts = _merge_fresh(storage, e.path, data, sha)
+            files[e.path] = (data, sha)
+            conflicts[e.path].extend(k for k in new_conflicts if k not in conflicts[e.path])
+    else:
+        raise ShaConflict(", ".join(files))
+    for path, (data, _) in files.items():
+        versions.remember(path, new_shas[path], copy.deepcopy(data))
+        _written(path, data, new_shas[path])
+    merge_conflicts = [MergeConflict(path, keys, new_shas[path]) for path, keys in conflicts.items() if keys]
+    return new_shas, merge_conflicts
+
+
+_queue = None
+_journal = None
+REPLAY_DELAY = 30  # Sekunden zwischen zwei Versuchen, das Journal nachzuspielen
+
+
+def get_journal():
+    global _journal
+    with _storage_lock:
+        if _journal is None:
+            _journal = Journal(config.setting("journal_path", REPO_ROOT / "openlibrary.journal.jsonl"))
+        return _journal
+
+
+def get_queue():
+    global _queue
+    journal = get_journal()
+    with _storage_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(
+                write_document,
+                quiet_period=float(config.setting("write_behind_seconds", 5)),
+                max_pending=int(config.setting("write_behind_max", 20)),
+                write_many=write_documents,
+                throttle=github_client.throttle_delay if config.setting("storage", "github") == "github" else None,
+                on_written=journal.mark_done,
+                remember=versions.remember,
+            )
+            # Beim Beenden des Servers nichts Ungespeichertes verlieren
+            atexit.register(_queue.flush)
+            pending = journal.pending()
+            if pending:
+                threading.Thread(
+                    target=_replay, args=(_queue, pending), name="journal", daemon=True
+                ).start()
+        return _queue
+
+
+def _replay(queue, entries):
+    # Nach einem Neustart: nie bestätigte Änderungen aus dem Journal wieder einreihen.
+    # Die Ereignisse enthalten absolute Werte und werden auf den aktuellen Stand gelegt;
+    # für die betroffenen Einträge gewinnt also die offline erfasste Änderung.
+    by_path = {}
+    for entry in entries:
+        by_path.setdefault(entry["path"], []).append(entry)
+    while by_path:
+        for path, items in list(by_path.items()):
+            pending = queue.pending(path)
+            try:
+                # Seit dem Neustart schon wieder geändert: auf den wartenden Stand legen
+                current, sha = pending if pending is not None else get_storage().read(path, fresh=True)
+            except Exception:
+                continue  # noch offline, später erneut
+            data = apply_events(current, [e for item in items for e in item["events"]])
+            if pending is None:
+                # Sonst bliebe unter sha der wartende statt des gespeicherten Stands als Merge-Basis
+                versions.remember(path, sha, copy.deepcopy(current))
+            queue.submit(*_submission(
+                path, data, sha, f"Nachgetragen aus dem Journal ({len(items)} Änderungen)",
+                journal_ids=[item["id"] for item in items],
+            ))
+            del by_path[path]
+        if by_path:
+            time.sleep(REPLAY_DELAY)
+
+
+def pop_conflicts(path):
+    return get_queue().pop_conflicts(path)
+
+
+def record_status(path, record):
+    # Speicherstatus eines Eintrags: pending / confirmed / failed / conflict oder None
+    status = get_queue().status(path, record)
+    return status.state if status else None
+
+
+def failed_records(path):
+    return get_queue().records_in_state(path, FAILED)
+
+
+def retry_failed():
+    get_queue().retry()
+
+
+_offline = set()  # Pfade, die gerade aus der lokalen Kopie kommen
+_persisted = {}  # path -> sha der lokalen Kopie
+
+
+def offline(path):
+    # True, wenn der zuletzt geladene Stand von path aus der lokalen Kopie stammt
+    return path in _offline
+
+
+def _copy_file(path):
+    # Letzter gelesener oder geschriebener Stand, neben dem Journal
+    return get_journal().path.parent / "openlibrary.cache" / path
+
+
+def _persist(path, data, sha):
+    # Lokale Kopie für einen Neustart während eines Ausfalls; nur bei neuem Stand schreiben
+    if _persisted.get(path) == sha:
+        return
+    target = _copy_file(path)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(json.dumps({"sha": sha, "data": data}, ensure_ascii=False))
+        os.replace(tmp, target)
+        _persisted[path] = sha
+    except OSError:
+        logger.exception("Lokale Kopie von %s nicht geschrieben", path)
+
+
+on_written(_persist)
+
+
+def _local_copy(path):
+    # -> (data, sha) aus der lokalen Kopie plus offene Journal-Einträge, oder None
+    try:
+        kopie = json.loads(_copy_file(path).read_text())
+    except (OSError, ValueError):
+        return None
+    data, sha = kopie["data"], kopie["sha"]
+    versions.remember(path, sha, copy.deepcopy(data))
+    events = [e for entry in get_journal().pending() if entry["path"] == path for e in entry["events"]]
+    return apply_events(data, events), sha
+
+
+def data_version(sha):
+    # Schlüssel für Anzeige-Caches: gespeicherter Stand plus wartende Änderungen und Status
+    return sha, get_queue().revision
+
+
+def _read(path, von=None, bis=None):
+    storage = get_storage()
+    if getattr(storage, "ranged", False):
+        # Nur die Partitionen holen, die den sichtbaren Zeitraum überlappen
+        return storage.read(path, von=von, bis=bis)
+    return storage.read(path)
+
+
+def load_document(path, von=None, bis=None):
+    # Noch nicht geschriebene Änderungen haben Vorrang vor dem gespeicherten Stand
+    queue = get_queue()
+    pending = queue.pending_with_base(path)
+    if pending is not None and (von is None and bis is None or not getattr(get_storage(), "ranged", False)):
+        # Mit dem Token des wartenden Stands: ein weiterer Save merged genau gegen diesen
+        data, token, _ = pending
+        versions.remember(path, token, copy.deepcopy(data))
+        return data, token
+    try:
+        data, sha = _read(path, von, bis)
+    except Exception as e:
+        # Z. B. Neustart während GitHub nicht erreichbar ist: mit der lokalen Kopie weiterarbeiten.
+        # Gespeichert wird wie immer über Journal und Warteschlange, sobald es wieder geht.
+        kopie = pending[:2] if pending is not None else _local_copy(path)
+        if kopie is None:
+            raise StorageUnavailable(path) from e
+        logger.warning("%s nicht lesbar, lokale Kopie wird verwendet", path)
+        _offline.add(path)
+        return kopie
+    _offline.discard(path)
+    versions.remember(path, sha, copy.deepcopy(data))
+    _persist(path, data, sha)
+    if pending is not None:
+        # Wartende Änderungen über den angefragten Zeitraum legen. Das Ergebnis ist weder
+        # der gelesene noch der wartende Stand und bekommt deshalb ein eigenes Token.
+        pending_data, _, queued_on = pending
+        data, _ = merge_document(versions.get(path, queued_on) or {}, pending_data, data)
+        sha = queue.new_token(sha)
+        versions.remember(path, sha, copy.deepcopy(data))
+    if schema.needs_migration(path, data):
+        return _migrate(path, data, sha, ranged=von is not None or bis is not None)
+    return data, sha
+
+
+def _migrate(path, data, sha, ranged=False):
+    # Einmalig das ganze Dokument migrieren und speichern; danach genügt der Versionsvergleich
+    if ranged and getattr(get_storage(), "ranged", False):
+        try:
+            data, sha = get_storage().read(path)
+        except Exception:
+            return schema.migrate(path, copy.deepcopy(data)), sha  # beim nächsten Laden erneut versuchen
+        versions.remember(path, sha, copy.deepcopy(data))
+    migrated = schema.migrate(path, copy.deepcopy(data))
+    if sha is not None:
+        version = migrated[schema.SCHEMA_KEY]
+        _save(path, migrated, sha, f"Schema von {path} auf Version {version} migriert")
+    return migrated, sha
+
+
+def _submission(path, data, sha, commit_message, journal_ids=None):
+    schema.stamp(path, data)
+    # Der Stand, den der Aufrufer geladen hat – nicht der wartende, sonst würden
+    # Einträge einer anderen Session als gelöscht gelten
+    base = versions.get(path, sha)
+    records = changed_records(base, data) if base is not None else ()
+    if journal_ids is None:
+        # Erst sicher auf die lokale Platte, dann in die Warteschlange
+        journal_ids = [get_journal().append(path, sha, diff_events(base or {}, data))]
+    return path, data, sha, commit_message, records, journal_ids, base
+
+
+def _save(path, data, sha, commit_message):
+    # Nur in die Warteschlange stellen; geschrieben wird im Hintergrund
+    queue = get_queue()
+    return queue.submit(*_submission(path, data, sha, commit_message))
+
+
+def load_kontrollen(von=None, bis=None):
+    return load_document(config.KONTROLLEN_PATH, von, bis)
+
+
+def save_kontrollen(data, sha):
+    commit_message = f"Update Kontrollen am {date.today().isoformat()}"
+    return _save(config.KONTROLLEN_PATH, data, sha, commit_message)
+
+
+def load_planung(von=None, bis=None):
+    return load_document(config.PLANUNG_PATH, von, bis)
+
+
+def save_planung(planung, sha, commit_message=None):
+    commit_message = commit_message or f"Update Arbeitsplan am {date.today().isoformat()}"
+    return _save(config.PLANUNG_PATH, planung, sha, commit_message)
+
+
+def save_planung_and_kontrollen(planung, planung_sha, data, kontrollen_sha):
+    # Arbeitsplan und Wochenverantwortung zusammen: ein gemeinsamer Commit
+    queue = get_queue()
+    heute = date.today().isoformat()
+    shas = queue.submit_many([
+        _submission(config.PLANUNG_PATH, planung, planung_sha, f"Update Arbeitsplan am {heute}"),
+        _submission(config.KONTROLLEN_PATH, data, kontrollen_sha, f"Update Kontrollen am {heute}"),
+    ])
+    return shas[config.PLANUNG_PATH], shas[config.KONTROLLEN_PATH]
@@ -0,0 +1,276 @@
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .merge import MergeConflict, merge_document
+
+logger = logging.getLogger(__name__)
+
+# Zustand eines Eintrags (z. B. "kontrollen/2025-07-01") für die Anzeige
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+CONFLICT = "conflict"
+
+MAX_RETRY_DELAY = 300  # Sekunden
+KEEP_CONFIRMED = 600  # so lange bleibt "gespeichert" sichtbar
+
+
+def queued_token(sha, version):
+    # Version eines wartenden Stands: gespeichertes sha plus laufende Nummer der Warteschlange,
+    # z. B. "3f2a…#17". Unter diesem Token liegt der Stand als Merge-Basis für den nächsten Save.
+    return f"{stored_sha(sha) or ''}#{version}"
+
+
+def stored_sha(sha):
+    # Token -> sha des gespeicherten Stands, auf dem er aufbaut
+    if not sha or "#" not in sha:
+        return sha
+    return sha.split("#", 1)[0] or None
+
+
+@dataclass
+class PendingWrite:
+    data: dict
+    sha: str  # Stand, auf dem die Änderungen aufbauen (sha oder Token eines wartenden Stands)
+    commit_message: str
+    version: int  # laufende Nummer des aktuellen Stands, siehe queued_token
+    changes: int = 1
+    records: set = field(default_factory=set)
+    journal: list = field(default_factory=list)  # ids der Journal-Einträge in data
+
+
+@dataclass
+class RecordStatus:
+    state: str
+    seq: int
+    error: str = None
+    updated: float = field(default_factory=time.time)
+
+
+class WriteBehindQueue:
+    # Änderungen sofort im Speicher übernehmen und gesammelt als ein Commit schreiben,
+    # sobald quiet_period Sekunden nichts mehr passiert ist oder max_pending erreicht ist.
+    # Geschrieben wird ausschliesslich im Hintergrund-Worker, nie im Skript-Thread.
+    def __init__(self, write, quiet_period=5.0, max_pending=20, write_many=None, throttle=None,
+                 on_written=None, remember=None):
+        self.write = write  # write(path, data, sha, commit_message) -> neues sha
+        # write_many({path: (data, sha)}, commit_message) -> ({path: sha}, [MergeConflict]);
+        # damit wird ein Flush über mehrere Dateien zu einem einzigen Commit
+        self.write_many = write_many
+        self.throttle = throttle  # throttle() -> Sekunden, um die jeder Flush mindestens wartet
+        self.on_written = on_written  # on_written(journal_ids) nach erfolgreichem Schreiben
+        self.remember = remember  # remember(path, token, data) für jeden wartenden Stand
+        self.quiet_period = quiet_period
+        self.max_pending = max_pending
+        self._pending = {}
+        self._conflicts = []
+        self._status = {}  # (path, record) -> RecordStatus
+        self._seq = 0
+        self.revision = 0  # zählt jede Änderung an wartenden Daten oder Status (für Anzeige-Caches)
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speichern")
+
+    def has_pending(self, path):
+        with self._lock:
+            return path in self._pending
+
+    def pending(self, path):
+        # -> (data, Token) des wartenden Stands oder None
+        pending = self.pending_with_base(path)
+        return pending and pending[:2]
+
+    def pending_with_base(self, path):
+        # -> (data, Token, sha oder Token des Stands, auf dem die wartenden Änderungen aufbauen)
+        with self._lock:
+            eintrag = self._pending.get(path)
+            if eintrag is None:
+                return None
+            return copy.deepcopy(eintrag.data), queued_token(eintrag.sha, eintrag.version), eintrag.sha
+
+    def new_token(self, sha):
+        # Eigenes Token für einen Stand, den der Aufrufer selbst zusammengesetzt hat
+        with self._lock:
+            self._seq += 1
+            return queued_token(sha, self._seq)
+
+    def submit(self, path, data, sha, commit_message, records=(), journal=(), base=None):
+        return self.submit_many([(path, data, sha, commit_message, records, journal, base)])[path]
+
+    def submit_many(self, writes):
+        # writes: [(path, data, sha, commit_message, records, journal, base)] – landen sicher im selben Flush.
+        # base ist der Stand, den der Aufrufer geladen hat (None = unbekannt).
+        # -> {path: Token des neuen wartenden Stands}; damit kann der Aufrufer gleich weiter speichern
+        shas = {}
+        with self._lock:
+            for path, data, sha, commit_message, records, journal, base in writes:
+                eintrag = self._pending.get(path)
+                conflicts = []
+                if eintrag:
+                    # Schon etwas in der Warteschlange, z. B. aus einer anderen Session:
+                    # unsere Änderungen gegenüber base darüberlegen statt den Stand zu ersetzen
+                    data, conflicts = merge_document(base if base is not None else eintrag.data, data, eintrag.data)
+                    eintrag.data = copy.deepcopy(data)
+                    eintrag.commit_message = commit_message
+                    eintrag.changes += 1
+                else:
+                    # Veraltetes sha ist kein Problem: der Flush merged dann gegen diesen Stand
+                    eintrag = self._pending[path] = PendingWrite(copy.deepcopy(data), sha, commit_message, 0)
+                self._seq += 1
+                eintrag.version = self._seq
+                shas[path] = queued_token(eintrag.sha, eintrag.version)
+                if self.remember is not None:
+                    self.remember(path, shas[path], copy.deepcopy(eintrag.data))
+                if conflicts:
+                    # Wartender Stand bleibt für diese Einträge, wie beim Merge gegen GitHub
+                    self._conflicts.append(MergeConflict(path, conflicts, eintrag.sha))
+                for record in records:
+                    self._seq += 1
+                    if record in conflicts:
+                        self._status[(path, record)] = RecordStatus(CONFLICT, self._seq)
+                        continue
+                    self._status[(path, record)] = RecordStatus(PENDING, self._seq)
+                    eintrag.records.add(record)
+                eintrag.journal.extend(journal)
+            self.revision += 1
+            total = sum(e.changes for e in self._pending.values())
+            self._schedule(0 if self.quiet_period <= 0 or total >= self.max_pending else self.quiet_period)
+        return shas
+
+    def status(self, path, record):
+        with self._lock:
+            return self._status.get((path, record))
+
+    def records_in_state(self, path, state):
+        with self._lock:
+            return sorted(r for (p, r), s in self._status.items() if p == path and s.state == state)
+
+    def retry(self):
+        with self._lock:
+            self._failures = 0
+            if self._pending:
+                self._schedule(0)
+
+    def pop_conflicts(self, path):
+        with self._lock:
+            found = [e for e in self._conflicts if e.path == path]
+            self._conflicts = [e for e in self._conflicts if e.path != path]
+        return found
+
+    def _schedule(self, delay):
+        # Aufrufer hält self._lock
+        if self.throttle is not None:
+            delay = max(delay, self.throttle())
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._executor.submit, args=(self.flush,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _mark(self, path, records, state, error=None):
+        # Aufrufer hält self._lock; nur Einträge ohne neuere Änderung umstellen
+        for record, seq in records.items():
+            status = self._status.get((path, record))
+            if status is not None and status.seq == seq:
+                self._status[(path, record)] = RecordStatus(state, seq, error)
+                self.revision += 1
+
+    def _write_batch(self, batch):
+        # -> {path: Liste der Konflikt-Schlüssel oder die Exception beim Schreiben}
+        messages = {
+            path: message if changes == 1 else f"{message} ({changes} Änderungen)"
+            for path, (_, _, message, changes, *_) in batch.items()
+        }
+        if self.write_many is not None and len(batch) > 1:
+            # Mehrere Dateien: ein gemeinsamer Commit, alles oder nichts
+            try:
+                _, merge_conflicts = self.write_many(
+                    {path: (data, sha) for path, (data, sha, *_) in batch.items()}, "; ".join(messages.values())
+                )
+            except Exception as e:
+                logger.exception("Speichern von %s fehlgeschlagen, neuer Versuch folgt", ", ".join(batch))
+                return {path: e for path in batch}
+            with self._lock:
+                self._conflicts.extend(merge_conflicts)
+            keys = {e.path: e.keys for e in merge_conflicts}
+            return {path: keys.get(path, []) for path in batch}
+        results = {}
+        for path, (data, sha, *_) in batch.items():
+            try:
+                self.write(path, data, sha, messages[path])
+                results[path] = []
+            except MergeConflict as e:
+                # Gemergter Stand ist gespeichert, Konflikte den Seiten melden
+                results[path] = e.keys
+                with self._lock:
+                    self._conflicts.append(e)
+            except Exception as e:
+                logger.exception("Speichern von %s fehlgeschlagen, neuer Versuch folgt", path)
+                results[path] = e
+        return results
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = {
+                    path: (copy.deepcopy(e.data), e.sha, e.commit_message, e.changes,
+                           {r: self._status[(path, r)].seq for r in e.records if (path, r) in self._status},
+                           e.version)
+                    for path, e in self._pending.items()
+                }
+                journal = {path: list(e.journal) for path, e in self._pending.items()}
+            failed = False
+            retry_after = 0
+            results = self._write_batch(batch)
+            for path, (data, sha, commit_message, changes, records, version) in batch.items():
+                conflicts = results[path]
+                if isinstance(conflicts, Exception):
+                    failed = True
+                    retry_after = max(retry_after, getattr(conflicts, "retry_after", None) or 0)
+                    with self._lock:
+                        self._mark(path, records, FAILED, str(conflicts))
+                    continue
+                if self.on_written is not None:
+                    self.on_written(journal[path])
+                with self._lock:
+                    self._mark(path, {r: s for r, s in records.items() if r not in conflicts}, CONFIRMED)
+                    self._mark(path, {r: s for r, s in records.items() if r in conflicts}, CONFLICT)
+                    eintrag = self._pending.get(path)
+                    if eintrag is not None and eintrag.changes == changes:
+                        del self._pending[path]
+                    elif eintrag is not None:
+                        # Während des Schreibens kamen neue Änderungen dazu; sie bauen auf dem
+                        # geschriebenen Stand auf. Der nächste Flush merged deshalb mit diesem
+                        # als Basis gegen das, was inzwischen gespeichert ist.
+                        eintrag.sha = queued_token(sha, version)
+                        if self.remember is not None:
+                            self.remember(path, eintrag.sha, copy.deepcopy(data))
+                        eintrag.changes -= changes
+                        eintrag.journal = [i for i in eintrag.journal if i not in journal[path]]
+                        eintrag.records -= {
+                            r for r, seq in records.items()
+                            if getattr(self._status.get((path, r)), "seq", None) == seq
+                        }
+            with self._lock:
+                self._failures = self._failures + 1 if failed else 0
+                now = time.time()
+                self._status = {
+                    k: s for k, s in self._status.items()
+                    if s.state != CONFIRMED or now - s.updated < KEEP_CONFIRMED
+                }
+                if self._pending:
+                    delay = self.quiet_period
+                    if failed:
+                        delay = min(MAX_RETRY_DELAY, max(self.quiet_period, 5) * 2 ** self._failures)
+                        # Kontingent aufgebraucht: erst nach dem Reset wieder versuchen
+                        delay = max(delay, retry_after)
+                    self._schedule(delay)
@@ -1,92 +1,29 @@
 import streamlit as st
 import json
-from github import Github
 from datetime import date, timedelta
-from streamlit_calendar import calendar
-from github.GithubException import GithubException
-import base64
-
-#Repo-Infos
-GITHUB_USER="DST81"
-REPO_NAME="openlibrary-kontrolle"
-BRANCH= "main"
-FILE_PATH = "arbeitsplan.json"
-
-token=st.secrets['github_token']
-g=Github(token)
-repo= g.get_user(GITHUB_USER).get_repo(REPO_NAME)
-
-# === Hilfsfunktionen ===
-def load_kontrollen():
-    try:
-        contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-        data = json.loads(contents.decoded_content.decode())
-        return data, contents.sha
-    except Exception:
-        return {}, None
-
-def save_kontrollen(data_dict, sha):
-    new_content = json.dumps(data_dict, indent=2, ensure_ascii=False)
-    commit_message = f"Update Arbeitsplan am {date.today().isoformat()}"
-    try:
-        if sha:
-            repo.update_file(FILE_PATH, commit_message, new_content, sha, branch=BRANCH)
-        else:
-            repo.create_file(FILE_PATH, commit_message, new_content, branch=BRANCH)
-    except GithubException as e:
-        if e.status == 422:
-            contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-            repo.update_file(FILE_PATH, commit_message, new_content, contents.sha, branch=BRANCH)
-        else:
-            raise
-    contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-    return contents.sha
-
-def migrate_kontrollen_if_needed(raw_data):
-    # Falls schon alles vorhanden ist
-    if all(k in raw_data for k in ["kontrollen", "wochenverantwortung", "planung"]):
-        return raw_data
-    kontrollen = raw_data.get("kontrollen", {})
-    wochenverantwortung = raw_data.get("wochenverantwortung", {})
-    planung = raw_data.get("planung", {})
-    # Falls alte Struktur (nur Datumsschlüssel) → migrieren
-    if not kontrollen and any(k for k in raw_data.keys() if "-" in k):
-        for key, value in raw_data.items():
-            try:
-                date.fromisoformat(key)
-                kontrollen[key] = value
-            except ValueError:
-                pass
-    return {
-        "kontrollen": kontrollen,
-        "wochenverantwortung": wochenverantwortung,
-        "planung": planung
-    }
+from openlibrary.avatars import AVATARS, avatar_html, sprite_css
+from openlibrary.config import PLANUNG_PATH
+from openlibrary.coverage import check
+from openlibrary.dates import LANG, SPALTE, WOCHENTAGE, format_date
+from openlibrary.data import (
+    LADEFEHLER, SPEICHER_STATUS, StorageUnavailable, data_version, load_kontrollen, load_planung,
+    record_status, save_planung, save_planung_and_kontrollen, speicher_hinweise
+)
+from openlibrary.scheduler import ALWAYS_ACTIVE_SLOTS, ZEITEN, Verfuegbarkeit, active_slots, apply, plan
 
 # === Mitarbeiter-Avatare ===
-avatars = {
-    "Aniko": "avatars/aniko.png",
-    "Daniela": "avatars/daniela.png",
-    "Debora": "avatars/debora.png",
-    "Janine": "avatars/janine.png",
-    "Sarah": "avatars/sarah.png",
-    "Susanne": "avatars/susanne.png"
-}
-
-def img_to_base64(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-# Avatare in Base64 umwandeln
-avatars_b64 = {name: img_to_base64(path) for name, path in avatars.items()}
-
-planung,sha  = load_kontrollen()
-
+avatars = AVATARS
 
 st.set_page_config(page_title='Arbeitsplanung', page_icon='📅', layout='wide')
+
+# Avatar-Sprite einmal einbinden; die Slots verweisen nur noch auf CSS-Klassen
+st.markdown(sprite_css(), unsafe_allow_html=True)
             
 st.title('Arbeitsplanung - Termine')
 
+# Konflikte und fehlgeschlagenes Speichern melden
+speicher_hinweise(PLANUNG_PATH)
+
 if "start_date" not in st.session_state:
     #aktueller Wochenanfang(Montag)
     today=date.today()
@@ -110,16 +47,40 @@ if "start_date" not in st.session_state:
      
 start_date= st.session_state.start_date
 days =[start_date + timedelta(days=i) for i in range(7)]
-wochentage = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
-zeiten=['Morgen','Nachmittag']
+
+# Nur die angezeigte Woche laden
+try:
+    planung, sha = load_planung(start_date, start_date + timedelta(days=6))
+except StorageUnavailable:
+    st.error(LADEFEHLER)
+    st.stop()
+zeiten=ZEITEN
+
+# Sicherstellen, dass session_state für Slots existiert
+if 'planning_slots' not in st.session_state:
+    st.session_state['planning_slots'] = {}
+
+def slot_aktiv(tag, zeit, default):
+    # Häkchen aus der Wochenansicht übersteuern die festen Öffnungszeiten (auch für die automatische Einteilung)
+    return st.session_state['planning_slots'].get(tag.isoformat(), {}).get(zeit, default)
+
+# Unbesetzte aktive Slots und Personen, die gleichzeitig einen Klassenbesuch haben.
+# Der Index gleicht nur die sichtbare Woche ab, und nur wenn sich der Datenstand geändert hat.
+bericht = check(planung, days[0], days[-1], slot_aktiv, data_version(sha))
+luecken = set(bericht.luecken)
+konflikte = {(k.tag, k.zeit, k.person): k.termin for k in bericht.konflikte}
+if bericht.luecken:
+    st.warning("⚠️ Niemand eingeteilt: " + ", ".join(f"{format_date(tag, SPALTE)} {zeit}" for tag, zeit in bericht.luecken))
+for k in bericht.konflikte:
+    st.warning(f"⚠️ {k.person} ist am {format_date(k.tag, SPALTE)} ({k.zeit}) eingeteilt und hat einen Klassenbesuch: {k.termin}")
 
 
 # Erste Reihe: Wochentage + Datum
 cols=st.columns(7)
-for col, tag, wd in zip(cols,days, wochentage):
+for col, tag in zip(cols,days):
     col.markdown(
         f"<div style='border:1px solid #ddd; padding:5px; text-align:center; font-weight:bold;'>"
-        f"{wd} {tag.day}.{tag.month}"
+        f"{format_date(tag, SPALTE)}"
         f"</div>", unsafe_allow_html=True
     )
 #Max Höhe bestimmen
@@ -135,33 +96,20 @@ slot_height = 60+ max_avatars * 40
 
 #Zweite Reihe: Unterteilung in Morgen, Nachmittag und Abend mit Avatare + Namen
 
-always_active_slots = {
-    "Tuesday": ["Nachmittag"],    # Dienstag Nachmittag
-    "Wednesday": ["Morgen"],      # Mittwoch Morgen
-    "Thursday": ["Morgen", "Nachmittag"],  # Donnerstag Morgen + Nachmittag
-    "Friday": ["Morgen"],         # Freitag Morgen
-    "Saturday": ["Morgen"]        # Samstag Morge
-}
-
 cols=st.columns(7)
-# Sicherstellen, dass session_state für Slots existiert
-if 'planning_slots' not in st.session_state:
-    st.session_state['planning_slots'] = {}
-
 for col, tag in zip(cols, days):
     tag_str = tag.isoformat()
-    wochentag= tag.strftime("%A")
     if tag_str not in st.session_state['planning_slots']:
         st.session_state['planning_slots'][tag_str] = {}
 
     col_html = ''
     for zeit in zeiten:
         # Status des Slots (aktiv oder nicht)
-        default= zeit in always_active_slots.get(wochentag, [])
+        default= zeit in ALWAYS_ACTIVE_SLOTS.get(tag.weekday(), [])
         slot_needed = st.session_state['planning_slots'][tag_str].get(zeit, default)
 
-        # Hintergrundfarbe: grün, wenn Slot aktiv
-        bg_color = "#c6f5c6" if slot_needed else "#f9f9f9"
+        # Hintergrundfarbe: grün, wenn Slot aktiv; rot, wenn aktiv und niemand eingeteilt
+        bg_color = "#f8d7da" if (tag, zeit) in luecken else "#c6f5c6" if slot_needed else "#f9f9f9"
 
         col_html += (
             f"<div style='border:1px solid #ccc; padding:3px; min-height:{slot_height}px; "
@@ -171,13 +119,17 @@ for col, tag in zip(cols, days):
         # Avatare einfügen, falls vorhanden
         slot_personen = planung.get(tag_str, {}).get('oeffnungszeiten', {}).get(zeit, [])
         for p in slot_personen:
-            if p in avatars_b64:
+            if p in avatars:
+                # Gleichzeitiger Klassenbesuch: Name rot markieren
+                konflikt = konflikte.get((tag, zeit, p))
+                name = f"<small style='color:#c00;'>⚠️ {p}</small>" if konflikt else f"<small>{p}</small>"
                 col_html += (
                     f"<div style='display:inline-block; margin:2px;'>"
-                    f"<img src='data:image/png;base64,{avatars_b64[p]}' width='30' "
-                    f"style='border-radius:50%; display:block; margin:auto;'>"
-                    f"<small>{p}</small></div>"
+                    f"{avatar_html(p, 'display:block; margin:auto;')}"
+                    f"{name}</div>"
                 )
+        if (tag, zeit) in luecken:
+            col_html += "<small>⚠️ niemand eingeteilt</small>"
         col_html += '</div>'
 
     # HTML in Spalte rendern
@@ -186,7 +138,7 @@ for col, tag in zip(cols, days):
     # Kleine Checkbox einklappar
     with col.expander('🛠'):
         for zeit in zeiten:
-            default = zeit in always_active_slots.get(wochentag, [])
+            default = zeit in ALWAYS_ACTIVE_SLOTS.get(tag.weekday(), [])
             slot_needed = st.session_state['planning_slots'][tag_str].get(zeit, default)
             slot_needed = st.checkbox(
                 zeit, value=slot_needed, key=f"slot_{tag_str}_{zeit}"
@@ -203,17 +155,72 @@ for col, tag in zip(cols,days):
         text += f"📝 {details['klassenbesuch']}<br>"
     if details.get("bemerkung"):
         text += f"💡 {details['bemerkung']}<br>"
+    speicher_status = record_status(PLANUNG_PATH, tag_str)
+    if speicher_status in SPEICHER_STATUS:
+        text += f"<small>{SPEICHER_STATUS[speicher_status]}</small>"
     col.markdown(
         f"<div style='border:1px solid #ddd; padding:5px; min-height:40px; text-align:left;'>{text}</div>",
         unsafe_allow_html=True
     )
  
+# === Öffnungszeiten automatisch einteilen ===
+with st.expander("🤖 Öffnungszeiten automatisch einteilen"):
+    with st.form("auto_plan"):
+        c1, c2, c3 = st.columns(3)
+        ab = c1.date_input("Ab Woche", value=st.session_state.start_date)
+        wochen = c2.number_input("Wochen", min_value=1, max_value=52, value=4)
+        pro_slot = c3.number_input("Personen pro Slot", min_value=1, max_value=3, value=1)
+        ueberschreiben = st.checkbox("Bestehende Einteilungen überschreiben")
+        st.caption("Verfügbarkeit pro Person (Max. Schichten im Zeitraum, 0 = unbegrenzt)")
+        verfuegbarkeit = {}
+        for person in avatars:
+            c1, c2 = st.columns([3, 1])
+            tage = c1.multiselect(
+                person, range(7), default=list(range(7)), format_func=lambda i: WOCHENTAGE[i], key=f"auto_tage_{person}"
+            )
+            max_schichten = c2.number_input("Max. Schichten", min_value=0, value=0, key=f"auto_max_{person}")
+            verfuegbarkeit[person] = Verfuegbarkeit(frozenset(tage), max_schichten or None)
+        berechnen = st.form_submit_button("🧮 Vorschlag berechnen")
+
+    if berechnen:
+        # Ganzer Arbeitsplan: die Historie aller Wochen fliesst in die Verteilung ein
+        planung_alle, _ = load_planung()
+        von = ab - timedelta(days=ab.weekday())
+        bis = von + timedelta(days=7 * wochen - 1)
+        slots = active_slots(von, bis, slot_aktiv)
+        st.session_state.auto_vorschlag = (
+            von, bis, plan(planung_alle, slots, list(avatars), verfuegbarkeit, pro_slot, ueberschreiben)
+        )
+
+    if "auto_vorschlag" in st.session_state:
+        von, bis, vorschlag = st.session_state.auto_vorschlag
+        if not vorschlag.zuteilung:
+            st.info("Alle aktiven Slots im Zeitraum sind schon eingeteilt.")
+        else:
+            st.markdown(f"**Vorschlag {format_date(von, LANG)} – {format_date(bis, LANG)}**")
+            st.table([
+                {"Tag": format_date(tag, LANG), "Zeit": zeit, "Personen": ", ".join(personen) or "—"}
+                for (tag, zeit), personen in vorschlag.zuteilung.items()
+            ])
+            if vorschlag.offen:
+                st.warning(f"⚠️ {len(vorschlag.offen)} Slots ohne (genug) verfügbare Personen")
+            st.caption("Schichten total inkl. Vorschlag: " + ", ".join(f"{p} {n}" for p, n in vorschlag.last.items()))
+            if st.button("✅ Vorschlag übernehmen"):
+                # Alle Slots zusammen: ein einziger Commit
+                planung_alle, planung_alle_sha = load_planung()
+                apply(planung_alle, vorschlag)
+                save_planung(planung_alle, planung_alle_sha, f"Arbeitsplan automatisch eingeteilt ({von} bis {bis})")
+                del st.session_state.auto_vorschlag
+                st.success("Einteilung gespeichert ✅")
+                st.rerun()
+
 # === Neues Event hinzufügen (manuell) ===
 st.subheader("📌 Termin hinzufügen")
 
 datum = st.date_input("Datum", value=st.session_state.start_date or date.today())
 
-# Standardwerte setzen, falls bereits geplant
+# Standardwerte setzen, falls bereits geplant (Datum kann ausserhalb der Woche liegen)
+planung, sha = load_planung(datum, datum)
 existing = planung.get(datum.isoformat(), {})
 default_oeffnungszeiten = existing.get("oeffnungszeiten", {})
 default_klassenbesuch = existing.get("klassenbesuch", "")
@@ -224,7 +231,18 @@ selected_personen = default_oeffnungszeiten.get(zeit_slot, [])
 oeffnungszeiten = st.multiselect("Wer übernimmt die Ausleihe?", list(avatars.keys()), default=selected_personen)
 klassenbesuch = st.text_input("Klassenbesuch (optional)", value=default_klassenbesuch)
 bemerkung = st.text_area("Bemerkung (optional)", value=default_bemerkung)
- 
+
+# Wochenverantwortung der gewählten Woche (liegt in kontrollen.json)
+montag = datum - timedelta(days=datum.weekday())
+kw_jahr, kw, _ = datum.isocalendar()
+kw_key = f"{kw_jahr}-W{kw:02d}"
+kontrollen_data, kontrollen_sha = load_kontrollen(montag, montag + timedelta(days=6))
+bisher_verantwortlich = kontrollen_data["wochenverantwortung"].get(kw_key)
+optionen = ["—"] + list(avatars.keys())
+verantwortlich = st.selectbox(
+    f"Wochenverantwortung KW {kw} (optional)", optionen,
+    index=optionen.index(bisher_verantwortlich) if bisher_verantwortlich in optionen else 0,
+)
       
 if st.button("💾 Speichern"):
     tag_str = str(datum)
@@ -239,6 +257,11 @@ if st.button("💾 Speichern"):
     planung[tag_str]["klassenbesuch"] = klassenbesuch if klassenbesuch else None
     planung[tag_str]["bemerkung"] = bemerkung if bemerkung else None
    
-    sha = save_kontrollen(planung, sha)
+    if verantwortlich != "—" and verantwortlich != bisher_verantwortlich:
+        # Termin und Wochenverantwortung in einem Commit speichern
+        kontrollen_data["wochenverantwortung"][kw_key] = verantwortlich
+        sha, kontrollen_sha = save_planung_and_kontrollen(planung, sha, kontrollen_data, kontrollen_sha)
+    else:
+        sha = save_planung(planung, sha)
     st.success("Termin gespeichert ✅")
     st.rerun()
@@ -1,90 +1,29 @@
 import streamlit as st
 import json
-from github import Github
 from datetime import date, timedelta
-from github.GithubException import GithubException
-import base64
-
-# ----------------- Repo-Infos -----------------
-GITHUB_USER = "DST81"
-REPO_NAME = "openlibrary-kontrolle"
-BRANCH = "main"
-FILE_PATH = "kontrollen.json"
-
-token = st.secrets['github_token']
-g = Github(token)
-repo = g.get_user(GITHUB_USER).get_repo(REPO_NAME)
-
-# ----------------- Hilfsfunktionen -----------------
-def load_kontrollen():
-    try:
-        contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-        data = json.loads(contents.decoded_content.decode())
-        return data, contents.sha
-    except Exception:
-        return {}, None
-
-def save_kontrollen(data_dict, sha):
-    new_content = json.dumps(data_dict, indent=2, ensure_ascii=False)
-    commit_message = f"Update Kontrollen/Planung am {date.today().isoformat()}"
-    try:
-        if sha:
-            repo.update_file(FILE_PATH, commit_message, new_content, sha, branch=BRANCH)
-        else:
-            repo.create_file(FILE_PATH, commit_message, new_content, branch=BRANCH)
-    except GithubException as e:
-        if e.status == 422 and "already exists" in str(e):
-            contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-            repo.update_file(FILE_PATH, commit_message, new_content, contents.sha, branch=BRANCH)
-        else:
-            raise
-    contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-    return contents.sha
-
-def migrate_kontrollen_if_needed(raw_data):
-    if all(k in raw_data for k in ["kontrollen", "wochenverantwortung", "planung"]):
-        return raw_data
-    kontrollen = raw_data.get("kontrollen", {})
-    wochenverantwortung = raw_data.get("wochenverantwortung", {})
-    planung = raw_data.get("planung", {})
-    if not kontrollen and any(k for k in raw_data.keys() if "-" in k):
-        for key, value in raw_data.items():
-            try:
-                date.fromisoformat(key)
-                kontrollen[key] = value
-            except ValueError:
-                pass
-    return {
-        "kontrollen": kontrollen,
-        "wochenverantwortung": wochenverantwortung,
-        "planung": planung
-    }
+from openlibrary.avatars import AVATARS, avatar_html, sprite_css
+from openlibrary.dates import SPALTE, format_date
+from openlibrary.data import LADEFEHLER, StorageUnavailable, load_kontrollen, save_kontrollen
 
 # ----------------- Mitarbeiter-Avatare -----------------
-avatars = {
-    "Aniko": "avatars/aniko.png",
-    "Daniela": "avatars/daniela.png",
-    "Debora": "avatars/debora.png",
-    "Janine": "avatars/janine.png",
-    "Sarah": "avatars/sarah.png",
-    "Susanne": "avatars/susanne.png"
-}
+avatars = AVATARS
 
-def img_to_base64(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+# ----------------- Streamlit Setup -----------------
+st.set_page_config(page_title='Arbeitsplanung', page_icon='📅', layout='wide')
 
-avatars_b64 = {name: img_to_base64(path) for name, path in avatars.items()}
+# Avatar-Sprite einmal einbinden; die Slots verweisen nur noch auf CSS-Klassen
+st.markdown(sprite_css(), unsafe_allow_html=True)
 
 # ----------------- Daten laden -----------------
-raw_data, sha = load_kontrollen()
-raw_data = migrate_kontrollen_if_needed(raw_data)
-kontrollen = raw_data['kontrollen']
-wochenverantwortung = raw_data["wochenverantwortung"]
-planung = raw_data["planung"]
+try:
+    data, sha = load_kontrollen()
+except StorageUnavailable:
+    st.error(LADEFEHLER)
+    st.stop()
+kontrollen = data["kontrollen"]
+wochenverantwortung = data["wochenverantwortung"]
+planung = data["planung"]
 
-# ----------------- Streamlit Setup -----------------
-st.set_page_config(page_title='Arbeitsplanung', page_icon='📅', layout='wide')
 st.title('Arbeitsplanung - Termine')
 
 if "start_date" not in st.session_state:
@@ -93,16 +32,15 @@ if "start_date" not in st.session_state:
 
 start_date = st.session_state.start_date
 days = [start_date + timedelta(days=i) for i in range(7)]
-wochentage = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
 zeiten = ['Morgen', 'Nachmittag', 'Abend']
 slot_height = 120  # feste Höhe pro Slot
 
 # ----------------- Wochentage anzeigen -----------------
 cols = st.columns(7)
-for col, tag, wd in zip(cols, days, wochentage):
+for col, tag in zip(cols, days):
     col.markdown(
         f"<div style='border:1px solid #ddd; padding:5px; text-align:center; font-weight:bold;'>"
-        f"{wd} {tag.day}.{tag.month}"
+        f"{format_date(tag, SPALTE)}"
         f"</div>", unsafe_allow_html=True
     )
 
@@ -146,7 +84,7 @@ for col, tag in zip(cols, days):
             st.markdown(
                 f"<div style='border:1px solid #ccc; min-height:{slot_height}px; "
                 f"margin-bottom:5px; padding:5px; background-color:{bg_color}; "
-                f'display:flex; flex-direction:column;'>'
+                f"display:flex; flex-direction:column;'>"
                 f"<div style='flex:0 0 auto; font-weight:bold;'>{zeit}</div>"
                 f"<div style='flex:1 1 auto; display:flex; align-items:center; margin-top:5px;'>"
                 f"</div></div>",
@@ -168,9 +106,9 @@ for col, tag in zip(cols, days):
             with inner_cols[1]:
                 slot_personen = planung.get(tag_str, {}).get('oeffnungszeiten', {}).get(zeit, [])
                 for p in slot_personen:
-                    if p in avatars_b64:
+                    if p in avatars:
                         st.markdown(
-                            f'<img src="data:image/png;base64,{avatars_b64[p]}" width="30" title="{p}" style="margin-right:5px;">',
+                            avatar_html(p, "margin-right:5px;"),
                             unsafe_allow_html=True
                         )
 
@@ -216,10 +154,6 @@ if st.button("💾 Speichern"):
     planung[tag_str]["klassenbesuch"] = klassenbesuch or None
     planung[tag_str]["bemerkung"] = bemerkung or None
 
-    sha = save_kontrollen({
-        "kontrollen": kontrollen,
-        "wochenverantwortung": wochenverantwortung,
-        "planung": planung
-    }, sha)
+    sha = save_kontrollen(data, sha)
     st.success("Termin gespeichert ✅")
     st.rerun()
@@ -0,0 +1,78 @@
+import streamlit as st
+import altair as alt
+from datetime import date
+from openlibrary.analytics import WOCHENTAGE, einsatzstatistik, kontrollstatistik
+from openlibrary.config import FERIEN_ENDE, FERIEN_START
+from openlibrary.data import LADEFEHLER, StorageUnavailable, data_version, load_kontrollen, load_planung
+
+st.set_page_config(page_title='Statistik', page_icon='📊', layout='wide')
+st.title('📊 Statistik')
+
+# Ganze Dokumente; kommen aus dem Snapshot der Datenschicht
+try:
+    data, sha = load_kontrollen()
+    planung, planung_sha = load_planung()
+except StorageUnavailable:
+    st.error(LADEFEHLER)
+    st.stop()
+
+# Ferien nur bis heute zählen, sonst sinkt der Anteil während der laufenden Ferien
+ferien_bis = min(FERIEN_ENDE, date.today())
+statistik = kontrollstatistik(data["kontrollen"], FERIEN_START, ferien_bis, data_version(sha))
+einsatz = einsatzstatistik(planung, data_version(planung_sha))
+
+# === Kontrollen pro Person ===
+st.subheader("Kontrollen")
+if statistik.personen.empty:
+    st.info("Noch keine Kontrollen erfasst.")
+else:
+    c1, c2 = st.columns(2)
+    c1.metric("Kontrollen total", int(statistik.personen["Kontrollen"].sum()))
+    c2.metric(
+        f"Ferientage kontrolliert ({FERIEN_START:%d.%m.} – {ferien_bis:%d.%m.})",
+        f"{statistik.abdeckung:.0%}",
+    )
+    st.dataframe(
+        statistik.personen,
+        column_config={"Anteil Ferien": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1)},
+    )
+
+    personen = statistik.personen.reset_index()
+    st.altair_chart(
+        alt.Chart(personen).mark_bar().encode(
+            x=alt.X("Kontrollen:Q"),
+            y=alt.Y("Person:N", sort="-x", title=None),
+            tooltip=list(personen.columns),
+        ),
+        use_container_width=True,
+    )
+
+    # Wochentage als Heatmap: Person x Wochentag
+    wochentage = statistik.wochentage.reset_index().melt("Person", var_name="Wochentag", value_name="Anzahl")
+    st.markdown("#### Wochentage")
+    st.altair_chart(
+        alt.Chart(wochentage).mark_rect().encode(
+            x=alt.X("Wochentag:N", sort=WOCHENTAGE),
+            y=alt.Y("Person:N", title=None),
+            color=alt.Color("Anzahl:Q", scale=alt.Scale(scheme="greens")),
+            tooltip=["Person", "Wochentag", "Anzahl"],
+        ),
+        use_container_width=True,
+    )
+
+# === Einsatz laut Arbeitsplan ===
+st.subheader("Einsatz laut Arbeitsplan")
+if einsatz.empty:
+    st.info("Noch keine Schichten geplant.")
+else:
+    schichten = einsatz.drop(columns="Total").reset_index().melt("Person", var_name="Zeit", value_name="Schichten")
+    st.altair_chart(
+        alt.Chart(schichten).mark_bar().encode(
+            x=alt.X("sum(Schichten):Q", title="Schichten"),
+            y=alt.Y("Person:N", sort="-x", title=None),
+            color=alt.Color("Zeit:N", sort=list(einsatz.columns)),
+            tooltip=["Person", "Zeit", "Schichten"],
+        ),
+        use_container_width=True,
+    )
+    st.dataframe(einsatz)
@@ -1,76 +1,26 @@
 import streamlit as st
 import json
-from github import Github
 from datetime import date, timedelta
-from streamlit_calendar import calendar
-from github.GithubException import GithubException
-import base64
-
-#Repo-Infos
-GITHUB_USER="DST81"
-REPO_NAME="openlibrary-kontrolle"
-BRANCH= "main"
-FILE_PATH = "arbeitsplan.json"
-
-token=st.secrets['github_token']
-g=Github(token)
-repo= g.get_user(GITHUB_USER).get_repo(REPO_NAME)
-
-import json, base64
-from datetime import date, timedelta
-import streamlit as st
-from github import GithubException
-
-# Pfad zur neuen Datei
-FILE_PATH_ARBEITSPLAN = "arbeitsplan.json"
-
-# === Laden & Speichern für Arbeitsplan ===
-def load_planung():
-    try:
-        contents = repo.get_contents(FILE_PATH_ARBEITSPLAN, ref=BRANCH)
-        data = json.loads(contents.decoded_content.decode())
-        return data, contents.sha
-    except Exception:
-        return {}, None   # leere Planung beim ersten Start
-
-def save_planung(planung, sha):
-    new_content = json.dumps(planung, indent=2, ensure_ascii=False)
-    commit_message = f"Update Arbeitsplan am {date.today().isoformat()}"
-    try:
-        if sha:
-            repo.update_file(FILE_PATH_ARBEITSPLAN, commit_message, new_content, sha, branch=BRANCH)
-        else:
-            repo.create_file(FILE_PATH_ARBEITSPLAN, commit_message, new_content, branch=BRANCH)
-    except GithubException as e:
-        if e.status == 422 and "already exists" in str(e):
-            contents = repo.get_contents(FILE_PATH_ARBEITSPLAN, ref=BRANCH)
-            repo.update_file(FILE_PATH_ARBEITSPLAN, commit_message, new_content, contents.sha, branch=BRANCH)
-        else:
-            raise
-    contents = repo.get_contents(FILE_PATH_ARBEITSPLAN, ref=BRANCH)
-    return contents.sha
+from openlibrary.avatars import AVATARS, avatar_html, sprite_css
+from openlibrary.dates import SPALTE, format_date
+from openlibrary.data import LADEFEHLER, StorageUnavailable, load_planung, save_planung
 
 # === Mitarbeiter-Avatare ===
-avatars = {
-    "Aniko": "avatars/aniko.png",
-    "Daniela": "avatars/daniela.png",
-    "Debora": "avatars/debora.png",
-    "Janine": "avatars/janine.png",
-    "Sarah": "avatars/sarah.png",
-    "Susanne": "avatars/susanne.png"
-}
+avatars = AVATARS
 
-def img_to_base64(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+# === UI Setup ===
+st.set_page_config(page_title='Arbeitsplanung', page_icon='📅', layout='wide')
 
-avatars_b64 = {name: img_to_base64(path) for name, path in avatars.items()}
+# Avatar-Sprite einmal einbinden; die Slots verweisen nur noch auf CSS-Klassen
+st.markdown(sprite_css(), unsafe_allow_html=True)
 
 # === Daten laden ===
-planung, sha = load_planung()
+try:
+    planung, sha = load_planung()
+except StorageUnavailable:
+    st.error(LADEFEHLER)
+    st.stop()
 
-# === UI Setup ===
-st.set_page_config(page_title='Arbeitsplanung', page_icon='📅', layout='wide')
 st.title('Arbeitsplanung - Termine')
 
 # Startdatum = Montag dieser Woche
@@ -80,25 +30,24 @@ if "start_date" not in st.session_state:
 
 start_date = st.session_state.start_date
 days = [start_date + timedelta(days=i) for i in range(7)]
-wochentage = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
 zeiten = ['Morgen', 'Nachmittag']
 
 # === Tabelle mit Slots ===
 cols = st.columns(7)
-for col, tag, wd in zip(cols, days, wochentage):
+for col, tag in zip(cols, days):
     tag_str = tag.isoformat()
     eintrag = planung.get(tag_str, {"oeffnungszeiten": {z: [] for z in zeiten}, "klassenbesuch": None, "bemerkung": ""})
 
-    col.markdown(f"### {wd} {tag.day}.{tag.month}")
+    col.markdown(f"### {format_date(tag, SPALTE)}")
     
     # Öffnungszeiten anzeigen
     for zeit in zeiten:
         personen = eintrag["oeffnungszeiten"].get(zeit, [])
         col.write(f"**{zeit}:**")
         for p in personen:
-            if p in avatars_b64:
+            if p in avatars:
                 col.markdown(
-                    f"<img src='data:image/png;base64,{avatars_b64[p]}' width='30' style='border-radius:50%;'> {p}",
+                    f"{avatar_html(p)} {p}",
                     unsafe_allow_html=True
                 )
 
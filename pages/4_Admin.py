@@ -0,0 +1,51 @@
+import streamlit as st
+from datetime import datetime
+from openlibrary import data, github_client, github_files
+from openlibrary.config import KONTROLLEN_PATH, PLANUNG_PATH
+from openlibrary.storage import failed_records, get_storage, retry_failed
+
+st.set_page_config(page_title='Admin', page_icon='🛠️')
+st.title('🛠️ Admin')
+
+# === GitHub-Kontingent ===
+st.subheader("GitHub-Kontingent")
+quota = github_client.quota()
+if quota.remaining is None:
+    st.info("Dieser Prozess hat noch keine Antwort von GitHub erhalten.")
+else:
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Verbleibend", f"{quota.remaining} / {quota.limit}")
+    c2.metric("Anfragen dieses Prozesses", quota.requests)
+    c3.metric("Zurückgesetzt um", datetime.fromtimestamp(quota.reset).strftime("%H:%M:%S"))
+    st.progress(quota.remaining / quota.limit if quota.limit else 0.0)
+    if github_client.quota_low():
+        st.warning(
+            f"Kontingent knapp (unter {github_client.LOW_QUOTA}): Daten kommen aus dem Cache, "
+            f"Speichern wartet mindestens {github_client.throttle_delay():.0f} s."
+        )
+    st.caption(f"Stand: {datetime.fromtimestamp(quota.updated).strftime('%H:%M:%S')}")
+
+# === Cache ===
+st.subheader("Cache")
+cache = github_files.cache_info()
+if cache:
+    st.table(cache)
+else:
+    st.caption("Leer")
+if st.button("🧹 Cache leeren"):
+    github_files.invalidate()
+    data.invalidate()
+    st.rerun()
+
+# === Speichern ===
+st.subheader("Speichern")
+st.caption(f"Speicher: {get_storage().name}")
+for path in (KONTROLLEN_PATH, PLANUNG_PATH):
+    fehlgeschlagen = failed_records(path)
+    if fehlgeschlagen:
+        st.error(f"{path}: nicht gespeichert – {', '.join(fehlgeschlagen)}")
+    else:
+        st.success(f"{path}: alles gespeichert")
+if st.button("🔁 Erneut versuchen"):
+    retry_failed()
+    st.rerun()
@@ -1,92 +1,25 @@
 import streamlit as st
 import json
-from github import Github
 from datetime import date, timedelta
-from streamlit_calendar import calendar
-from github.GithubException import GithubException
-import base64
-
-#Repo-Infos
-GITHUB_USER="DST81"
-REPO_NAME="openlibrary-kontrolle"
-BRANCH= "main"
-FILE_PATH = "kontrollen.json"
-
-token=st.secrets['github_token']
-g=Github(token)
-repo= g.get_user(GITHUB_USER).get_repo(REPO_NAME)
-
-# === Hilfsfunktionen ===
-def load_kontrollen():
-    try:
-        contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-        data = json.loads(contents.decoded_content.decode())
-        return data, contents.sha
-    except Exception:
-        return {}, None
-
-def save_kontrollen(data_dict, sha):
-    new_content = json.dumps(data_dict, indent=2, ensure_ascii=False)
-    commit_message = f"Update Kontrollen/Planung am {date.today().isoformat()}"
-    try:
-        if sha:
-            repo.update_file(FILE_PATH, commit_message, new_content, sha, branch=BRANCH)
-        else:
-            repo.create_file(FILE_PATH, commit_message, new_content, branch=BRANCH)
-    except GithubException as e:
-        if e.status == 422 and "already exists" in str(e):
-            contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-            repo.update_file(FILE_PATH, commit_message, new_content, contents.sha, branch=BRANCH)
-        else:
-            raise
-    contents = repo.get_contents(FILE_PATH, ref=BRANCH)
-    return contents.sha
-
-def migrate_kontrollen_if_needed(raw_data):
-    # Falls schon alles vorhanden ist
-    if all(k in raw_data for k in ["kontrollen", "wochenverantwortung", "planung"]):
-        return raw_data
-    kontrollen = raw_data.get("kontrollen", {})
-    wochenverantwortung = raw_data.get("wochenverantwortung", {})
-    planung = raw_data.get("planung", {})
-    # Falls alte Struktur (nur Datumsschlüssel) → migrieren
-    if not kontrollen and any(k for k in raw_data.keys() if "-" in k):
-        for key, value in raw_data.items():
-            try:
-                date.fromisoformat(key)
-                kontrollen[key] = value
-            except ValueError:
-                pass
-    return {
-        "kontrollen": kontrollen,
-        "wochenverantwortung": wochenverantwortung,
-        "planung": planung
-    }
+from openlibrary.avatars import AVATARS, avatar_html, sprite_css
+from openlibrary.data import LADEFEHLER, StorageUnavailable, load_kontrollen, save_kontrollen
 
 # === Mitarbeiter-Avatare ===
-avatars = {
-    "Aniko": "avatars/aniko.png",
-    "Daniela": "avatars/daniela.png",
-    "Debora": "avatars/debora.png",
-    "Janine": "avatars/janine.png",
-    "Sarah": "avatars/sarah.png",
-    "Susanne": "avatars/susanne.png"
-}
-
-def img_to_base64(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-# Avatare in Base64 umwandeln
-avatars_b64 = {name: img_to_base64(path) for name, path in avatars.items()}
-
-raw_data,sha  = load_kontrollen()
-raw_data = migrate_kontrollen_if_needed(raw_data)
-kontrollen = raw_data['kontrollen']
-wochenverantwortung = raw_data["wochenverantwortung"]
-planung = raw_data["planung"]
+avatars = AVATARS
+
+try:
+    data, sha = load_kontrollen()
+except StorageUnavailable:
+    st.error(LADEFEHLER)
+    st.stop()
+kontrollen = data["kontrollen"]
+wochenverantwortung = data["wochenverantwortung"]
+planung = data["planung"]
 
 st.set_page_config(page_title='Test', page_icon='📅', layout='wide')
+
+# Avatar-Sprite einmal einbinden; die Slots verweisen nur noch auf CSS-Klassen
+st.markdown(sprite_css(), unsafe_allow_html=True)
             
 st.title('Arbeitsplanung - Termine')
 
@@ -153,11 +86,10 @@ for col, tag in zip(cols,days):
 
             if slot_personen:
                 for p in slot_personen:
-                    if p in avatars_b64:
+                    if p in avatars:
                         col_html += (
                             f"<div style='display:inline-block; margin:4px;'>"
-                            f"<img src='data:image/png;base64,{avatars_b64[p]}' "
-                            f"width='30' style='border-radius:50%; display:block; margin:auto;'>"
+                            f"{avatar_html(p, 'display:block; margin:auto;')}"
                             f"<small>{p}</small>"
                             f"</div>"
                         )
@@ -213,10 +145,6 @@ if st.button("💾 Speichern"):
     planung[tag_str]["klassenbesuch"] = klassenbesuch if klassenbesuch else None
     planung[tag_str]["bemerkung"] = bemerkung if bemerkung else None
    
-    sha = save_kontrollen({
-        "kontrollen": kontrollen,
-        "wochenverantwortung": wochenverantwortung,
-        "planung": planung
-    }, sha)
+    sha = save_kontrollen(data, sha)
     st.success("Termin gespeichert ✅")
     st.rerun()
@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from openlibrary import schema, storage
+
+PFAD = "kontrollen.json"
+
+
+@pytest.fixture
+def lokal(tmp_path, monkeypatch):
+    # Lokales Backend in tmp_path, Warteschlange schreibt nur bei flush()
+    doc = {"kontrollen": {}, "wochenverantwortung": {}, schema.SCHEMA_KEY: schema.current_version(PFAD)}
+    (tmp_path / PFAD).write_text(json.dumps(doc))
+    monkeypatch.setenv("OPENLIBRARY_STORAGE", "local")
+    monkeypatch.setenv("OPENLIBRARY_LOCAL_ROOT", str(tmp_path))
+    monkeypatch.setenv("OPENLIBRARY_JOURNAL_PATH", str(tmp_path / "journal.jsonl"))
+    monkeypatch.setenv("OPENLIBRARY_WRITE_BEHIND_SECONDS", "3600")
+    monkeypatch.setattr(storage, "_storage", None)
+    monkeypatch.setattr(storage, "_journal", None)
+    monkeypatch.setattr(storage, "_queue", None)
+    monkeypatch.setattr(storage, "_persisted", {})
+    monkeypatch.setattr(storage, "_offline", set())
+    yield tmp_path
+    # Nichts für den atexit-Flush übrig lassen
+    if storage._queue is not None:
+        storage._queue.flush()
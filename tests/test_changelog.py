@@ -0,0 +1,79 @@
+import pytest
+
+from openlibrary.changelog import ChangeLogStorage, _split, _token, apply_events, diff_events, log_path
+from openlibrary.merge import ShaConflict, VersionStore
+from openlibrary.storage import LocalStorage
+
+PFAD = "kontrollen.json"
+
+
+def log_speicher(root, compact_every=50):
+    return ChangeLogStorage(LocalStorage(root), VersionStore(), compact_every=compact_every)
+
+
+def test_diff_und_anwenden():
+    base = {"kontrollen": {"2026-06-15": {"mitarbeiter": "Janine"}, "2026-06-16": {"mitarbeiter": "Aniko"}}, "x": 1}
+    neu = {"kontrollen": {"2026-06-15": {"mitarbeiter": "Sarah"}}, "wochenverantwortung": {}, "x": 1}
+    events = diff_events(base, neu)
+    assert {(e["op"], e["section"], e["key"]) for e in events} == {
+        ("set", "kontrollen", "2026-06-15"),
+        ("del", "kontrollen", "2026-06-16"),
+        ("set", None, "wochenverantwortung"),
+    }
+    assert apply_events(base, events) == neu
+    # Absolute Werte: zweimal anwenden ergibt denselben Stand
+    assert apply_events(apply_events(base, events), events) == neu
+
+
+def test_token():
+    assert _split(_token("abc", "12", 3)) == ("abc", "12", 3)
+    assert _split(_token(None, None, 0)) == (None, None, 0)
+    assert _split(None) == (None, None, 0)
+
+
+def test_schreiben_und_lesen(tmp_path):
+    speicher = log_speicher(tmp_path)
+    doc, sha = speicher.read(PFAD)
+    assert doc == {}
+    doc = {"kontrollen": {"2026-06-15": {"mitarbeiter": "Janine"}}}
+    sha = speicher.write(PFAD, doc, sha, "check-in")
+    assert log_speicher(tmp_path).read(PFAD) == (doc, sha)
+    assert not (tmp_path / PFAD).exists()  # noch kein Snapshot
+
+
+def test_verdichten(tmp_path):
+    speicher = log_speicher(tmp_path, compact_every=3)  # erster Save: Abschnitt + Eintrag = 2 Ereignisse
+    doc, sha = speicher.read(PFAD)
+    for tag in ("2026-06-15", "2026-06-16"):
+        doc = {"kontrollen": {**doc.get("kontrollen", {}), tag: {"mitarbeiter": "Janine"}}}
+        sha = speicher.write(PFAD, doc, sha, "check-in")
+    assert _split(sha)[2] == 0
+    assert (tmp_path / log_path(PFAD)).read_text() == ""
+    assert log_speicher(tmp_path).read(PFAD) == (doc, sha)
+
+
+def test_abgebrochenes_verdichten(tmp_path, monkeypatch):
+    speicher = log_speicher(tmp_path, compact_every=3)  # erster Save: Abschnitt + Eintrag = 2 Ereignisse
+    doc, sha = speicher.read(PFAD)
+    doc = {"kontrollen": {"2026-06-15": {"mitarbeiter": "Janine"}}}
+    sha = speicher.write(PFAD, doc, sha, "check-in")
+
+    # Snapshot geschrieben, Prozess stirbt vor dem Leeren des Logs
+    def abbruch(*args):
+        raise RuntimeError("abgebrochen")
+
+    monkeypatch.setattr(speicher.backend, "truncate_lines", abbruch)
+    neu = {"kontrollen": {**doc["kontrollen"], "2026-06-16": {"mitarbeiter": "Aniko"}}}
+    with pytest.raises(RuntimeError):
+        speicher.write(PFAD, neu, sha, "check-in")
+    assert (tmp_path / PFAD).exists() and (tmp_path / log_path(PFAD)).read_text()
+    # Die Ereignisse werden auf den Snapshot nochmals angewendet: derselbe Stand
+    assert log_speicher(tmp_path).read(PFAD)[0] == neu
+
+
+def test_veraltete_log_version(tmp_path):
+    a, sha = log_speicher(tmp_path).read(PFAD)
+    b, sha_b = log_speicher(tmp_path).read(PFAD)
+    log_speicher(tmp_path).write(PFAD, {"kontrollen": {"2026-06-16": {"mitarbeiter": "Aniko"}}}, sha_b, "b")
+    with pytest.raises(ShaConflict):
+        log_speicher(tmp_path).write(PFAD, {"kontrollen": {"2026-06-15": {"mitarbeiter": "Janine"}}}, sha, "a")
@@ -0,0 +1,12 @@
+from openlibrary.coverage import termine
+
+
+def test_bemerkung_ist_kein_termin():
+    eintrag = {"klassenbesuch": None, "bemerkung": "RückgabeDienstag (Janine kommt ab ca. 17 Uhr)"}
+    assert termine(eintrag) == []
+
+
+def test_klassenbesuch_mit_uhr():
+    [termin] = termine({"klassenbesuch": "Janine 17 Uhr P3", "bemerkung": None})
+    assert termin.personen == {"Janine"}
+    assert termin.zeiten == ("Nachmittag",)
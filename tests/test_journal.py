@@ -0,0 +1,56 @@
+import json
+
+from openlibrary import storage
+from openlibrary.journal import Journal
+
+PFAD = "kontrollen.json"
+
+
+def test_ids_nach_neustart_nicht_wiederverwenden(tmp_path):
+    pfad = tmp_path / "journal.jsonl"
+    journal = Journal(pfad)
+    offen = journal.append("kontrollen.json", "sha", [])
+    erledigt = journal.append("kontrollen.json", "sha", [])
+    journal.mark_done([erledigt])
+
+    # Neustart: neuer Eintrag darf nicht die id eines erledigten bekommen
+    journal = Journal(pfad)
+    neu = journal.append("kontrollen.json", "sha", [])
+    assert neu not in (offen, erledigt)
+
+    # Nächster Neustart: beide offenen Einträge sind noch da
+    assert [e["id"] for e in Journal(pfad).pending()] == [offen, neu]
+
+
+def test_neustart_waehrend_eines_ausfalls(lokal, monkeypatch):
+    data, sha = storage.load_kontrollen()
+    data["kontrollen"]["2026-06-16"] = {"mitarbeiter": "Janine", "bemerkung": ""}
+    storage.save_kontrollen(data, sha)
+
+    # Neustart, bevor geschrieben wurde; das Backend ist nicht erreichbar
+    monkeypatch.setattr(storage, "_storage", None)
+    monkeypatch.setattr(storage, "_journal", None)
+    monkeypatch.setattr(storage, "_queue", None)
+    monkeypatch.setattr(storage, "_persisted", {})
+    monkeypatch.setattr(storage, "REPLAY_DELAY", 3600)
+    read = storage.LocalStorage.read
+
+    def nicht_erreichbar(self, path, fresh=False):
+        raise ConnectionError(path)
+
+    monkeypatch.setattr(storage.LocalStorage, "read", nicht_erreichbar)
+
+    # Lokale Kopie plus offener Journal-Eintrag; Check-in bleibt möglich
+    data, sha = storage.load_kontrollen()
+    assert storage.offline(PFAD)
+    assert "2026-06-16" in data["kontrollen"]
+    data["kontrollen"]["2026-06-17"] = {"mitarbeiter": "Aniko", "bemerkung": ""}
+    storage.save_kontrollen(data, sha)
+
+    # Wieder erreichbar: beide Check-ins werden gespeichert
+    monkeypatch.setattr(storage.LocalStorage, "read", read)
+    storage.get_queue().flush()
+    gespeichert = json.loads((lokal / PFAD).read_text())["kontrollen"]
+    assert {"2026-06-16", "2026-06-17"} <= set(gespeichert)
+    storage.load_kontrollen()
+    assert not storage.offline(PFAD)
@@ -0,0 +1,165 @@
+import json
+from datetime import date
+
+import pytest
+
+from openlibrary import schema, storage
+from openlibrary.merge import ShaConflict, VersionStore
+from openlibrary.partitions import PartitionedStorage, join_document, partition_range, split_document
+from openlibrary.storage import LocalStorage
+
+PFAD = "kontrollen.json"
+
+
+def dokument():
+    return {
+        "kontrollen": {
+            "2025-12-31": {"mitarbeiter": "Janine", "bemerkung": ""},
+            "2026-01-02": {"mitarbeiter": "Aniko", "bemerkung": ""},
+            "2026-06-16": {"mitarbeiter": "Sarah", "bemerkung": ""},
+        },
+        "wochenverantwortung": {"2026-W01": "Aniko", "vorlage": "Janine"},
+        "planung": {},
+        schema.SCHEMA_KEY: schema.current_version(PFAD),
+    }
+
+
+class Zaehler(LocalStorage):
+    # Merkt sich, welche Dateien geschrieben wurden
+    def __init__(self, root):
+        super().__init__(root)
+        self.geschrieben = []
+
+    def write(self, path, data, sha, commit_message):
+        self.geschrieben.append(path)
+        return super().write(path, data, sha, commit_message)
+
+
+def partitioniert(root, granularity="year"):
+    return PartitionedStorage(Zaehler(root), VersionStore(), granularity=granularity)
+
+
+def test_aufteilen_und_zusammensetzen():
+    doc = dokument()
+    parts, meta = split_document(doc, "year")
+    assert sorted(parts) == ["2025", "2026"]
+    # 2026-W01 beginnt am 29.12.2025
+    assert parts["2025"]["wochenverantwortung"] == {"2026-W01": "Aniko"}
+    assert meta["wochenverantwortung"] == {"vorlage": "Janine"}
+    assert meta["top"] == {schema.SCHEMA_KEY: doc[schema.SCHEMA_KEY]}
+    assert join_document(parts.values(), meta) == doc
+
+
+def test_arbeitsplan_mit_datum_auf_oberster_ebene():
+    doc = {"2026-03-31": {"bemerkung": "x"}, "2026-04-01": {"bemerkung": "y"}, schema.SCHEMA_KEY: 1}
+    parts, meta = split_document(doc, "month")
+    assert sorted(parts) == ["2026-03", "2026-04"]
+    assert join_document(parts.values(), meta) == doc
+
+
+def test_zeitraum_einer_partition():
+    assert partition_range("2025") == (date(2025, 1, 1), date(2025, 12, 31))
+    assert partition_range("2025-12") == (date(2025, 12, 1), date(2025, 12, 31))
+    assert partition_range("2024-02") == (date(2024, 2, 1), date(2024, 2, 29))
+
+
+def test_erstes_speichern_teilt_auf(tmp_path):
+    (tmp_path / PFAD).write_text(json.dumps(dokument()))
+    speicher = partitioniert(tmp_path)
+    doc, sha = speicher.read(PFAD)
+    assert doc == dokument()
+    speicher.write(PFAD, doc, sha, "aufteilen")
+    assert sorted(p.name for p in (tmp_path / "kontrollen").iterdir()) == ["2025.json", "2026.json", "index.json"]
+    assert partitioniert(tmp_path).read(PFAD)[0] == dokument()
+
+
+def test_reste_eines_abgebrochenen_aufteilens(tmp_path):
+    (tmp_path / PFAD).write_text(json.dumps(dokument()))
+    # Partition liegt schon da, der Index fehlt noch
+    (tmp_path / "kontrollen").mkdir()
+    (tmp_path / "kontrollen" / "2026.json").write_text(json.dumps({"kontrollen": {"2026-02-02": {}}}))
+    speicher = partitioniert(tmp_path)
+    doc, sha = speicher.read(PFAD)
+    speicher.write(PFAD, doc, sha, "aufteilen")
+    assert partitioniert(tmp_path).read(PFAD)[0] == dokument()
+
+
+def test_nur_betroffene_partitionen_schreiben(tmp_path):
+    (tmp_path / PFAD).write_text(json.dumps(dokument()))
+    speicher = partitioniert(tmp_path)
+    speicher.write(PFAD, *speicher.read(PFAD), "aufteilen")
+
+    speicher = partitioniert(tmp_path)
+    doc, sha = speicher.read(PFAD)
+    doc["kontrollen"]["2026-06-17"] = {"mitarbeiter": "Janine", "bemerkung": ""}
+    speicher.write(PFAD, doc, sha, "check-in")
+    assert speicher.backend.geschrieben == ["kontrollen/2026.json"]
+
+
+def test_zeitraum_laedt_nur_ueberlappende_partitionen(tmp_path):
+    (tmp_path / PFAD).write_text(json.dumps(dokument()))
+    speicher = partitioniert(tmp_path)
+    speicher.write(PFAD, *speicher.read(PFAD), "aufteilen")
+
+    doc, sha = partitioniert(tmp_path).read(PFAD, von=date(2026, 6, 1), bis=date(2026, 6, 30))
+    assert sorted(doc["kontrollen"]) == ["2026-01-02", "2026-06-16"]
+    assert "2025=" not in sha
+    # Ausschnitt speichern lässt die nicht geladene Partition stehen
+    doc["kontrollen"]["2026-06-17"] = {"mitarbeiter": "Janine", "bemerkung": ""}
+    speicher = partitioniert(tmp_path)
+    speicher.write(PFAD, doc, sha, "check-in")
+    assert "2025-12-31" in partitioniert(tmp_path).read(PFAD)[0]["kontrollen"]
+
+
+def test_veraltete_partition_ist_ein_konflikt(tmp_path):
+    (tmp_path / PFAD).write_text(json.dumps(dokument()))
+    speicher = partitioniert(tmp_path)
+    speicher.write(PFAD, *speicher.read(PFAD), "aufteilen")
+
+    a, sha = partitioniert(tmp_path).read(PFAD)
+    b, sha_b = partitioniert(tmp_path).read(PFAD)
+    b["kontrollen"]["2026-06-18"] = {"mitarbeiter": "Aniko", "bemerkung": ""}
+    partitioniert(tmp_path).write(PFAD, b, sha_b, "b")
+    a["kontrollen"]["2026-06-17"] = {"mitarbeiter": "Janine", "bemerkung": ""}
+    with pytest.raises(ShaConflict):
+        partitioniert(tmp_path).write(PFAD, a, sha, "a")
+
+
+@pytest.fixture
+def lokal_partitioniert(tmp_path, monkeypatch):
+    (tmp_path / PFAD).write_text(json.dumps(dokument()))
+    speicher = partitioniert(tmp_path)
+    speicher.write(PFAD, *speicher.read(PFAD), "aufteilen")
+    monkeypatch.setenv("OPENLIBRARY_STORAGE", "local")
+    monkeypatch.setenv("OPENLIBRARY_LAYOUT", "partitioned")
+    monkeypatch.setenv("OPENLIBRARY_LOCAL_ROOT", str(tmp_path))
+    monkeypatch.setenv("OPENLIBRARY_JOURNAL_PATH", str(tmp_path / "journal.jsonl"))
+    monkeypatch.setenv("OPENLIBRARY_WRITE_BEHIND_SECONDS", "3600")
+    monkeypatch.setattr(storage, "_storage", None)
+    monkeypatch.setattr(storage, "_journal", None)
+    monkeypatch.setattr(storage, "_queue", None)
+    yield tmp_path
+    if storage._queue is not None:
+        storage._queue.flush()
+
+
+def test_zeitraum_laden_waehrend_ein_save_wartet(lokal_partitioniert):
+    juni = (date(2026, 6, 1), date(2026, 6, 30))
+    data, sha = storage.load_kontrollen(*juni)
+    data["kontrollen"]["2026-06-16"] = {"mitarbeiter": "Janine", "bemerkung": "neu"}
+    storage.save_kontrollen(data, sha)
+    # Die Seite lädt wie app.py nur den sichtbaren Zeitraum
+    data, _ = storage.load_kontrollen(*juni)
+    assert data["kontrollen"]["2026-06-16"]["bemerkung"] == "neu"
+
+    # Jemand anderes ändert einen anderen Tag in derselben Partition
+    fremd = partitioniert(lokal_partitioniert)
+    doc, fremd_sha = fremd.read(PFAD)
+    doc["kontrollen"]["2026-06-20"] = {"mitarbeiter": "Aniko", "bemerkung": ""}
+    fremd.write(PFAD, doc, fremd_sha, "fremd")
+
+    storage.get_queue().flush()
+    kontrollen = partitioniert(lokal_partitioniert).read(PFAD)[0]["kontrollen"]
+    assert kontrollen["2026-06-16"]["bemerkung"] == "neu"
+    assert "2026-06-20" in kontrollen
+    assert storage.pop_conflicts(PFAD) == []
@@ -0,0 +1,102 @@
+import json
+
+from openlibrary import storage
+from openlibrary.changelog import parse_jsonl
+
+PFAD = "kontrollen.json"
+
+
+def check_in(data, tag, person, bemerkung=""):
+    data["kontrollen"][tag] = {"mitarbeiter": person, "bemerkung": bemerkung}
+
+
+def gespeichert(root):
+    return json.loads((root / PFAD).read_text())["kontrollen"]
+
+
+def test_zwei_sessions_in_einer_ruhephase(lokal):
+    # A und B laden denselben Stand, speichern beide, bevor die Warteschlange schreibt
+    a, sha = storage.load_kontrollen()
+    b, sha_b = storage.load_kontrollen()
+    assert sha == sha_b
+    check_in(a, "2030-01-01", "Janine")
+    storage.save_kontrollen(a, sha)
+    check_in(b, "2030-01-02", "Aniko")
+    storage.save_kontrollen(b, sha_b)
+
+    # Das Journal von B enthält nur B's Eintrag, keine Löschung von A
+    events = [e for line in parse_jsonl((lokal / "journal.jsonl").read_text()) for e in line.get("events", [])]
+    assert not [e for e in events if e["op"] != "set"]
+
+    storage.get_queue().flush()
+    assert set(gespeichert(lokal)) == {"2030-01-01", "2030-01-02"}
+    assert storage.record_status(PFAD, "kontrollen/2030-01-01") == "confirmed"
+    assert storage.pop_conflicts(PFAD) == []
+
+
+def test_gleicher_eintrag_ist_ein_konflikt(lokal):
+    a, sha = storage.load_kontrollen()
+    b, _ = storage.load_kontrollen()
+    check_in(a, "2030-01-01", "Janine")
+    storage.save_kontrollen(a, sha)
+    check_in(b, "2030-01-01", "Aniko")
+    storage.save_kontrollen(b, sha)
+
+    konflikte = storage.pop_conflicts(PFAD)
+    assert [k.keys for k in konflikte] == [["kontrollen/2030-01-01"]]
+    assert storage.record_status(PFAD, "kontrollen/2030-01-01") == "conflict"
+    storage.get_queue().flush()
+    assert gespeichert(lokal)["2030-01-01"]["mitarbeiter"] == "Janine"
+
+
+def test_hinzufuegen_und_loeschen_in_einer_session(lokal):
+    data, sha = storage.load_kontrollen()
+    check_in(data, "2026-06-16", "Janine")
+    storage.save_kontrollen(data, sha)
+
+    # Nächster Rerun: lädt den wartenden Stand und löscht den Eintrag wieder
+    data, sha = storage.load_kontrollen()
+    del data["kontrollen"]["2026-06-16"]
+    storage.save_kontrollen(data, sha)
+
+    storage.get_queue().flush()
+    assert "2026-06-16" not in gespeichert(lokal)
+    assert storage.pop_conflicts(PFAD) == []
+
+
+def test_hinzufuegen_und_bearbeiten_in_einer_session(lokal):
+    data, sha = storage.load_kontrollen()
+    check_in(data, "2026-06-17", "Janine")
+    storage.save_kontrollen(data, sha)
+
+    data, sha = storage.load_kontrollen()
+    data["kontrollen"]["2026-06-17"]["bemerkung"] = "Rückgabe sortiert"
+    storage.save_kontrollen(data, sha)
+
+    assert storage.pop_conflicts(PFAD) == []
+    storage.get_queue().flush()
+    assert gespeichert(lokal)["2026-06-17"]["bemerkung"] == "Rückgabe sortiert"
+
+
+def test_loeschen_waehrend_geschrieben_wird(lokal, monkeypatch):
+    data, sha = storage.load_kontrollen()
+    check_in(data, "2026-06-18", "Janine")
+    storage.save_kontrollen(data, sha)
+
+    # Während der Flush schreibt, löscht die Session den Eintrag wieder
+    queue = storage.get_queue()
+    write = queue.write
+
+    def langsam(*args):
+        neu, token = storage.load_kontrollen()
+        del neu["kontrollen"]["2026-06-18"]
+        storage.save_kontrollen(neu, token)
+        return write(*args)
+
+    monkeypatch.setattr(queue, "write", langsam)
+    queue.flush()
+    assert "2026-06-18" in gespeichert(lokal)
+    monkeypatch.setattr(queue, "write", write)
+    queue.flush()
+    assert "2026-06-18" not in gespeichert(lokal)
+    assert storage.pop_conflicts(PFAD) == []